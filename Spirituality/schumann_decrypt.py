@@ -1,3 +1,6 @@
+import hashlib
+import json
+import os
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import cv2
@@ -7,7 +10,8 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 import pandas as pd
 
-# Define color ranges for decoding
+# Define color ranges for decoding: (lower, upper[, priority]). Where ranges overlap, the
+# higher priority wins (default 0), then the earlier entry
 color_ranges = {
     "Homeostasis/Calm (Blue)": ([0, 0, 128], [50, 50, 255]),   # Blue
     "Density/Blockages (Red)": ([128, 0, 0], [255, 50, 50]),   # Red
@@ -15,12 +19,18 @@ color_ranges = {
     "5D Light Coding (White)": ([200, 200, 200], [255, 255, 255]), # White
 }
 
-# Global variable to hold the image
+# Bits kept per channel in the color lookup table: 8 is exact (16 MB), 5 is a 32x32x32 table
+LUT_BITS = 8
+LUT_CACHE_DIR = "lut_cache"
+
+# Global variables to hold the image and its per-column category counts
 image = None
+column_counts = None
+_luts = {}  # Lookup tables already loaded, by cache key
 
 # Functions for decoding
 def load_image():
-    global image
+    global image, column_counts
     file_path = filedialog.askopenfilename(
         filetypes=[("PNG Files", "*.png")],
         title="Select a PNG Image"
@@ -29,41 +39,123 @@ def load_image():
         messagebox.showerror("Error", "No file selected!")
         return None
     try:
-        image = cv2.imread(file_path)
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        loaded = cv2.cvtColor(cv2.imread(file_path), cv2.COLOR_BGR2RGB)
+        # Classify once per image; every view is then computed from the column counts
+        counts = count_columns(classify_pixels(loaded, color_ranges), len(color_ranges))
+        # Only replace the current image once it has been fully processed
+        image, column_counts = loaded, counts
         messagebox.showinfo("Success", "Image loaded successfully!")
     except Exception as e:
         messagebox.showerror("Error", f"Failed to load image: {e}")
 
+def build_color_lut(color_ranges, bits=LUT_BITS):
+    """
+    Map every color, quantized to `bits` per channel, to its category:
+    0 for none, i + 1 for the i-th entry of color_ranges. A quantized bin
+    belongs to a range when its center value does. Ranges are painted as
+    boxes from lowest to highest precedence, so the last one written wins.
+    """
+    entries = list(color_ranges.values())
+    if len(entries) > 255:
+        raise ValueError("at most 255 color ranges are supported")
+    size, shift = 1 << bits, 8 - bits
+    centers = (np.arange(size) << shift) + ((1 << shift) >> 1)
+    lut = np.zeros((size, size, size), dtype=np.uint8)
+    precedence = sorted(range(len(entries)), key=lambda i: (range_priority(entries[i]), -i))
+    for index in precedence:
+        lower, upper = entries[index][:2]
+        spans = [np.flatnonzero((centers >= lower[channel]) & (centers <= upper[channel])) for channel in range(3)]
+        if all(len(span) for span in spans):
+            lut[tuple(slice(span[0], span[-1] + 1) for span in spans)] = index + 1
+    return lut
+
+def range_priority(entry):
+    return entry[2] if len(entry) > 2 else 0
+
+def load_color_lut(color_ranges, bits=LUT_BITS, cache_dir=LUT_CACHE_DIR):
+    """
+    The lookup table for this color_ranges configuration, built once and
+    cached to disk under a hash of the ranges, priorities and bits.
+    """
+    config = [bits] + [[list(entry[0]), list(entry[1]), range_priority(entry)] for entry in color_ranges.values()]
+    key = hashlib.sha1(json.dumps(config).encode()).hexdigest()[:16]
+    if key in _luts:
+        return _luts[key]
+    path = os.path.join(cache_dir, f"lut-{bits}-{key}.npy")
+    try:
+        lut = np.load(path)
+    except (OSError, ValueError):
+        lut = build_color_lut(color_ranges, bits)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(temporary, "wb") as f:
+                np.save(f, lut)
+            os.replace(temporary, path)
+        except OSError as e:
+            # The disk cache is only a speed-up; keep using the table built in memory
+            messagebox.showwarning("Warning", f"Could not cache the color lookup table in {cache_dir}: {e}")
+            if os.path.exists(temporary):
+                try:
+                    os.remove(temporary)
+                except OSError:
+                    pass
+    _luts[key] = lut
+    return lut
+
+def classify_pixels(image, color_ranges, bits=LUT_BITS):
+    """
+    Label every pixel with its category (see build_color_lut) with one
+    table lookup per pixel, however many categories there are.
+    """
+    lut = load_color_lut(color_ranges, bits)
+    shift = 8 - bits
+    index = image[..., 0] >> shift
+    index = index.astype(np.uint32)
+    for channel in (1, 2):
+        index <<= bits
+        index |= image[..., channel] >> shift
+    return lut.ravel().take(index)
+
+def count_columns(labels, num_categories):
+    """
+    Cumulative per-column counts of each category, shaped
+    (num_categories + 1, width + 1), so any span of columns [a, b) counts
+    as counts[:, b] - counts[:, a].
+    """
+    height, width = labels.shape
+    index = labels.astype(np.intp) * width + np.arange(width)
+    per_column = np.bincount(index.ravel(), minlength=(num_categories + 1) * width).reshape(-1, width)
+    counts = np.zeros((num_categories + 1, width + 1), dtype=np.int64)
+    np.cumsum(per_column, axis=1, out=counts[:, 1:])
+    return counts
+
+def section_bounds(width, num_intervals):
+    interval_width = width // num_intervals
+    bounds = [i * interval_width for i in range(num_intervals)]
+    return bounds + [width]  # The last section takes the remainder
+
+def section_proportions(counts, height, bounds, categories):
+    """
+    Percentage of each category in every section between consecutive
+    bounds, as one dict per section keyed by the category names.
+    """
+    bounds = np.asarray(bounds)
+    section_counts = np.diff(counts[1:, bounds], axis=1)
+    section_pixels = np.maximum(np.diff(bounds) * height, 1)
+    proportions = section_counts / section_pixels * 100
+    return [dict(zip(categories, section)) for section in proportions.T.tolist()]
+
 def extract_pixel_counts(image, color_ranges):
-    pixel_counts = defaultdict(int)
     height, width, _ = image.shape
-    for label, (lower, upper) in color_ranges.items():
-        lower_bound = np.array(lower, dtype="uint8")
-        upper_bound = np.array(upper, dtype="uint8")
-        mask = cv2.inRange(image, lower_bound, upper_bound)
-        count = cv2.countNonZero(mask)
-        pixel_counts[label] = count
+    labels = classify_pixels(image, color_ranges)
+    totals = np.bincount(labels.ravel(), minlength=len(color_ranges) + 1)
+    pixel_counts = defaultdict(int, zip(color_ranges.keys(), totals[1:].tolist()))
     return pixel_counts, height, width
 
-def split_into_time_sections(image, num_intervals):
-    height, width, _ = image.shape
-    interval_width = width // num_intervals
-    sections = []
-    for i in range(num_intervals):
-        start_x = i * interval_width
-        end_x = (i + 1) * interval_width if i < num_intervals - 1 else width
-        sections.append(image[:, start_x:end_x])
-    return sections
-
-def analyze_time_sections(sections, color_ranges):
-    results = []
-    for section in sections:
-        pixel_counts, height, width = extract_pixel_counts(section, color_ranges)
-        total_pixels = height * width
-        proportions = {label: (count / total_pixels) * 100 for label, count in pixel_counts.items()}
-        results.append(proportions)
-    return results
+def time_section_proportions(num_intervals):
+    height, width = image.shape[:2]
+    return section_proportions(column_counts, height, section_bounds(width, num_intervals), color_ranges.keys())
 
 def generate_timestamps(start_time, end_time, num_intervals):
     return pd.date_range(start=start_time, end=end_time, periods=num_intervals).strftime("%H:%M").tolist()
@@ -73,9 +165,8 @@ def show_overall_stats():
     if image is None:
         messagebox.showerror("Error", "No image loaded!")
         return
-    pixel_counts, height, width = extract_pixel_counts(image, color_ranges)
-    total_pixels = height * width
-    overall_proportions = {label: (count / total_pixels) * 100 for label, count in pixel_counts.items()}
+    height, width = image.shape[:2]
+    overall_proportions = section_proportions(column_counts, height, [0, width], color_ranges.keys())[0]
     
     plt.figure(figsize=(10, 6))
     plt.bar(overall_proportions.keys(), overall_proportions.values(), alpha=0.8)
@@ -90,8 +181,7 @@ def show_time_based_stats():
         messagebox.showerror("Error", "No image loaded!")
         return
     num_intervals = 24
-    time_sections = split_into_time_sections(image, num_intervals)
-    analysis_results = analyze_time_sections(time_sections, color_ranges)
+    analysis_results = time_section_proportions(num_intervals)
     timestamps = generate_timestamps("00:00", "23:59", num_intervals)
 
     df = pd.DataFrame(analysis_results, index=timestamps)
@@ -109,8 +199,7 @@ def show_3d_model():
         messagebox.showerror("Error", "No image loaded!")
         return
     num_intervals = 24
-    time_sections = split_into_time_sections(image, num_intervals)
-    analysis_results = analyze_time_sections(time_sections, color_ranges)
+    analysis_results = time_section_proportions(num_intervals)
     timestamps = generate_timestamps("00:00", "23:59", num_intervals)
 
     fig = plt.figure(figsize=(12, 8))
@@ -0,0 +1,133 @@
+import argparse
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # Headless unless a real driver is asked for
+
+import numpy as np
+import pygame
+
+import screensaver as ss
+
+STAGES = ("update", "symmetry", "ascii", "draw")
+
+
+def parse_size(text):
+    """
+    Parse "AxB" into (A, B).
+    """
+    first, _, second = text.lower().partition("x")
+    try:
+        return int(first), int(second)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected AxB, got {text!r}")
+
+
+def run(resolution, grid, frames, seed=None, dirty=False, export=None, pipeline=False):
+    """
+    Run `frames` frames of the screensaver loop on an offscreen display and
+    return the seconds spent in each stage per frame, plus the wall time.
+    With `pipeline`, the simulation stages run in a SimulationPipeline
+    worker while frames are drawn.
+    """
+    width, height = resolution
+    rows, cols = grid
+    random.seed(seed)
+    rng = np.random.default_rng(seed)
+    screen = pygame.display.set_mode((width, height))
+    font = pygame.font.SysFont("Courier", 14)
+
+    triangles = ss.create_triangle_grid(rows, cols, width, height)
+    renderer = ss.TriangleRenderer(triangles, rows, cols, (width, height))
+    overlay = ss.AsciiOverlay(font, triangles, rows, cols, (width, height))
+    regions = ss.DirtyRegions(triangles, overlay, rows, cols) if dirty else None
+    pattern = rng.integers(-1, 2, size=(rows, cols), dtype=np.int8)
+    ascii_grid = ss.generate_ascii_grid(rows, cols, rng)
+    color_offset = 0
+    timings = {stage: [] for stage in STAGES}
+
+    def step(state):
+        # ss.next_generation, split up so each stage is timed
+        previous, ascii_grid = state
+        t0 = time.perf_counter()
+        pattern = ss.trinary_logic_update(previous, perturbation_chance=0.02, rng=rng)
+        t1 = time.perf_counter()
+        ss.apply_symmetry(pattern, random.choice(ss.SYMMETRY_TYPES), out=pattern)
+        t2 = time.perf_counter()
+        if regions is None:
+            ascii_grid = ss.generate_ascii_grid(rows, cols, rng)
+        else:
+            ascii_grid = np.where(pattern != previous, ss.generate_ascii_grid(rows, cols, rng), ascii_grid)
+        t3 = time.perf_counter()
+        for stage, elapsed in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2)):
+            timings[stage].append(elapsed)
+        return pattern, ascii_grid
+
+    worker = ss.SimulationPipeline(step, (pattern, ascii_grid)) if pipeline else None
+    started = time.perf_counter()
+    try:
+        for frame in range(frames):
+            pygame.event.pump()
+            if worker is None:
+                pattern, ascii_grid = step((pattern, ascii_grid))
+            else:
+                pattern, ascii_grid = worker.get()
+            t0 = time.perf_counter()
+            color_offset = (color_offset + 1) % 255
+            if regions is None:
+                screen.fill((0, 0, 0))
+                ss.draw_triangles(screen, renderer, overlay, pattern, color_offset, ascii_grid)
+                pygame.display.flip()
+            else:
+                rects = ss.draw_dirty(screen, renderer, overlay, regions, pattern, color_offset, ascii_grid)
+                if rects is None:
+                    pygame.display.flip()
+                else:
+                    pygame.display.update(rects)
+            timings["draw"].append(time.perf_counter() - t0)
+            if export:
+                pygame.image.save(screen, os.path.join(export, f"{width}x{height}_{rows}x{cols}_{frame:05d}.png"))
+        wall = time.perf_counter() - started
+    finally:
+        if worker is not None:
+            worker.close()
+    # The pipeline worker may have run a generation or two past the last frame
+    return {stage: np.array(times[:frames]) for stage, times in timings.items()}, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless frame-time benchmark for the triangle screensaver.")
+    parser.add_argument("--resolutions", nargs="+", type=parse_size, default=[(1920, 1080), (3840, 2160)],
+                        metavar="WxH")
+    parser.add_argument("--grids", nargs="+", type=parse_size, default=[(40, 80), (200, 400)], metavar="ROWSxCOLS")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dirty", action="store_true", help="Benchmark the dirty-region drawing mode")
+    parser.add_argument("--pipeline", action="store_true", help="Simulate in a background thread while drawing")
+    parser.add_argument("--export", help="Also save every frame as a PNG into this directory (not timed)")
+    args = parser.parse_args()
+
+    if args.export:
+        os.makedirs(args.export, exist_ok=True)
+    pygame.init()
+    print(f"SDL video driver: {pygame.display.get_driver()}")
+    print(f"{'resolution':>11} {'grid':>9} " + " ".join(f"{stage + ' ms':>11}" for stage in STAGES)
+          + f" {'p95 ms':>8} {'fps':>8}")
+    try:
+        for width, height in args.resolutions:
+            for rows, cols in args.grids:
+                timings, wall = run((width, height), (rows, cols), args.frames, args.seed, args.dirty, args.export,
+                                    args.pipeline)
+                frame_times = sum(timings.values())
+                # Leave PNG export out of fps; pipelined stages overlap, so only wall time is meaningful there
+                fps = args.frames / frame_times.sum() if args.export and not args.pipeline else args.frames / wall
+                print(f"{f'{width}x{height}':>11} {f'{rows}x{cols}':>9} "
+                      + " ".join(f"{timings[stage].mean() * 1000:11.2f}" for stage in STAGES)
+                      + f" {np.percentile(frame_times, 95) * 1000:8.2f} {fps:8.1f}")
+    finally:
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
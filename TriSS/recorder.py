@@ -0,0 +1,119 @@
+import os
+import queue
+import shutil
+import subprocess
+import threading
+
+import numpy as np
+import pygame
+
+
+class FrameRecorder:
+    """
+    Records rendered frames without stalling the render loop.
+
+    `record` copies the surface into one of a fixed pool of preallocated
+    buffers (a straight copy of the 32-bit pixels) and hands it to an
+    encoder thread, which converts it to RGB and writes it out. When every
+    buffer is still waiting to be encoded, the frame is dropped and counted
+    instead of waiting.
+
+    The output depends on `path`: a directory (no extension) gets a PNG
+    sequence, a `.raw` file gets a raw rgb24 stream, and anything else is
+    piped through ffmpeg as a video.
+    """
+
+    def __init__(self, path, size, shifts=(16, 8, 0), fps=30, buffers=8):
+        self.path = path
+        self.width, self.height = size
+        self.shifts = shifts
+        self.fps = fps
+        self.recorded = 0
+        self.dropped = 0
+        self.encoded = 0
+        self.error = None
+        self.free = queue.Queue()
+        for _ in range(buffers):
+            self.free.put(np.empty((self.height, self.width), dtype=np.uint32))
+        self.work = queue.Queue()
+        self.output = self._open()
+        self.thread = threading.Thread(target=self._encoder, name="triss-recorder", daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def for_surface(cls, path, surface, **kwargs):
+        if surface.get_bytesize() != 4:
+            raise ValueError(f"recording needs a 32-bit surface, got {surface.get_bitsize()}-bit")
+        return cls(path, surface.get_size(), shifts=surface.get_shifts()[:3], **kwargs)
+
+    def _open(self):
+        extension = os.path.splitext(self.path)[1]
+        if not extension:
+            os.makedirs(self.path, exist_ok=True)
+            return None
+        if extension == ".raw":
+            return open(self.path, "wb")
+        if shutil.which("ffmpeg") is None:
+            raise RuntimeError(f"ffmpeg is needed to record {extension} video; record to a directory or .raw instead")
+        return subprocess.Popen(
+            ["ffmpeg", "-loglevel", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24",
+             "-s", f"{self.width}x{self.height}", "-r", str(self.fps), "-i", "-", "-pix_fmt", "yuv420p", self.path],
+            stdin=subprocess.PIPE,
+        )
+
+    def record(self, surface):
+        """
+        Queue a copy of `surface` for encoding; returns False if it was dropped.
+        """
+        try:
+            buffer = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        pixels = pygame.surfarray.pixels2d(surface)  # (x, y); its transpose is row-major like the buffer
+        np.copyto(buffer, pixels.T)
+        del pixels
+        self.work.put((self.recorded, buffer))
+        self.recorded += 1
+        return True
+
+    def close(self):
+        self.work.put(None)
+        self.thread.join()
+        if isinstance(self.output, subprocess.Popen):
+            self.output.stdin.close()
+            self.output.wait()
+        elif self.output is not None:
+            self.output.close()
+        if self.error is not None:
+            raise RuntimeError(f"recording to {self.path} failed") from self.error
+
+    def _rgb(self, buffer):
+        rgb = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        for channel, shift in enumerate(self.shifts):
+            np.right_shift(buffer, shift, out=rgb[:, :, channel], casting="unsafe")
+        return rgb
+
+    def _encoder(self):
+        while True:
+            item = self.work.get()
+            if item is None:
+                return
+            index, buffer = item
+            try:
+                if self.error is None:
+                    self._write(index, self._rgb(buffer))
+                    self.encoded += 1
+            except Exception as e:
+                self.error = e  # Keep draining so record never blocks; close reports it
+            finally:
+                self.free.put(buffer)
+
+    def _write(self, index, rgb):
+        if self.output is None:
+            image = pygame.image.frombuffer(rgb.tobytes(), (self.width, self.height), "RGB")
+            pygame.image.save(image, os.path.join(self.path, f"frame_{index:06d}.png"))
+        elif isinstance(self.output, subprocess.Popen):
+            self.output.stdin.write(rgb.tobytes())
+        else:
+            self.output.write(rgb.tobytes())
@@ -1,5 +1,27 @@
-import pygame
+import argparse
+import math
+import os
+import queue
 import random
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pygame
+
+from recorder import FrameRecorder
+
+_rng = np.random.default_rng()
+DOS_ASCII_CHARS = "█▒░╬║═▲▼■●♦♥☼≈≡×§¶¤"
+SYMMETRY_TYPES = ["horizontal", "vertical", "radial"]
+_workspaces = {}  # (rows, cols) -> scratch arrays reused by trinary_logic_update
+_tiles = {}  # Worker-side view onto a TiledSimulation's shared double buffer
+
+# Independent random streams of the seeded simulation
+_PATTERN_STREAM, _UPDATE_STREAM, _SYMMETRY_STREAM, _ASCII_STREAM = range(4)
+_BAND_ROWS = 256  # Rows advanced at a time, to bound the per-cell random words held in memory
+_MASK64 = (1 << 64) - 1
 
 
 def create_triangle_grid(rows, cols, screen_width, screen_height):
@@ -55,97 +77,637 @@ def generate_pattern(rows, cols):
     return [[random.choice([-1, 0, 1]) for _ in range(cols)] for _ in range(rows)]
 
 
-def apply_symmetry(pattern, symmetry_type):
-    """
-    Apply symmetry to the trinary pattern.
-    Supported symmetry types: 'horizontal', 'vertical', 'radial'.
-    """
+def _mirror_rows(pattern, out):
     rows = len(pattern)
-    cols = len(pattern[0])
-    new_pattern = [row[:] for row in pattern]  # Copy the pattern
+    out[rows - rows // 2:] = pattern[:rows // 2][::-1]  # Top half onto the bottom half
 
-    if symmetry_type == "horizontal":
-        for y in range(rows // 2):
-            new_pattern[rows - y - 1] = pattern[y]  # Mirror rows
 
-    elif symmetry_type == "vertical":
-        for y in range(rows):
-            for x in range(cols // 2):
-                new_pattern[y][cols - x - 1] = pattern[y][x]  # Mirror columns
+def _mirror_columns(pattern, out):
+    cols = pattern.shape[1]
+    out[:, cols - cols // 2:] = pattern[:, :cols // 2][:, ::-1]  # Left half onto the right half
 
-    elif symmetry_type == "radial":
-        for y in range(rows):
-            for x in range(cols):
-                if (x + y) % 2 == 0:  # Example symmetry: alternate parity
-                    new_pattern[rows - y - 1][cols - x - 1] = pattern[y][x]
 
-    return new_pattern
+def _radial(pattern, out):
+    # Cells with even (x + y) are copied to the point-mirrored cell, which has the parity of rows + cols:
+    # a checkerboard, done as two strided copies (even rows, odd rows)
+    rows, cols = pattern.shape
+    mirrored = pattern[::-1, ::-1]
+    parity = (rows + cols) % 2
+    odd_rows = mirrored[1::2, 1 - parity::2]
+    if np.may_share_memory(pattern, out):
+        odd_rows = odd_rows.copy()  # In place, the first copy can overwrite these sources
+    out[0::2, parity::2] = mirrored[0::2, parity::2]
+    out[1::2, 1 - parity::2] = odd_rows
+
+
+def _four_fold(pattern, out):
+    _mirror_columns(pattern, out)
+    _mirror_rows(out, out)
+
+
+def _diagonal(pattern, out):
+    # Below the main diagonal onto above it, within the leading square, 256 rows at a time
+    size, band = min(pattern.shape), 256
+    upper = np.triu(np.ones((band, band), dtype=bool), 1)
+    for start in range(0, size, band):
+        stop = min(start + band, size)
+        out[start:stop, stop:size] = pattern[stop:size, start:stop].T
+        np.copyto(out[start:stop, start:stop], pattern[start:stop, start:stop].T,
+                  where=upper[:stop - start, :stop - start])
+
+
+SYMMETRIES = {
+    "horizontal": _mirror_rows,
+    "vertical": _mirror_columns,
+    "radial": _radial,
+    "4-fold": _four_fold,
+    "diagonal": _diagonal,
+}
+
+
+def apply_symmetry(pattern, symmetry_type, out=None):
+    """
+    Apply symmetry to the trinary pattern.
+    Supported symmetry types are the keys of SYMMETRIES: 'horizontal',
+    'vertical', 'radial', '4-fold' and 'diagonal'.
+
+    The result is written into `out` when given, which may be `pattern`
+    itself to work in place; otherwise a new array is returned.
+    """
+    pattern = np.asarray(pattern)
+    if out is None:
+        out = pattern.copy()
+    elif out is not pattern:
+        np.copyto(out, pattern)
+    if symmetry_type in SYMMETRIES:
+        SYMMETRIES[symmetry_type](pattern, out)
+    return out
 
 
-def generate_ascii_grid(rows, cols):
+def generate_ascii_grid(rows, cols, rng=None):
     """
-    Generate a grid of random DOS ASCII characters.
+    Generate a grid of random DOS ASCII characters, as indices into DOS_ASCII_CHARS.
     """
-    dos_ascii_chars = "█▒░╬║═▲▼■●♦♥☼≈≡×§¶¤"
-    return [[random.choice(dos_ascii_chars) for _ in range(cols)] for _ in range(rows)]
+    rng = _rng if rng is None else rng
+    return rng.integers(len(DOS_ASCII_CHARS), size=(rows, cols), dtype=np.uint8)
 
 
-def trinary_logic_update(pattern, perturbation_chance=0.01):
+class _UpdateWorkspace:
+    """
+    Scratch arrays for one grid shape, so the per-frame update does not
+    allocate (and page-fault in) several full-grid temporaries every frame.
+    """
+
+    def __init__(self, rows, cols):
+        self.width = cols + 2
+        self.padded = np.empty((rows + 2, cols + 2), dtype=np.int8)
+        # Flat index of every cell's top-left neighbour in the padded grid
+        self.cell_index = np.arange(rows, dtype=np.int32)[:, None] * self.width + np.arange(cols, dtype=np.int32)
+        self.index = np.empty((rows, cols), dtype=np.int32)
+        self.block = np.empty((rows, cols), dtype=np.uint8)
+        self.block_row = np.empty((rows, cols), dtype=np.uint8)
+
+    def pad(self, pattern):
+        # Toroidal edges: wrap the last row/column around to the other side
+        padded = self.padded
+        padded[1:-1, 1:-1] = pattern
+        padded[0, 1:-1] = pattern[-1]
+        padded[-1, 1:-1] = pattern[0]
+        padded[:, 0] = padded[:, -2]
+        padded[:, -1] = padded[:, 1]
+        return padded.ravel()
+
+
+def _perturbed_cells(rng, size, chance):
+    """
+    Flat indices of the cells hit by an independent per-cell `chance`,
+    drawn as geometric gaps between hits so only the hits cost anything.
+    """
+    if chance <= 0:
+        return np.empty(0, dtype=np.int64)
+    if chance >= 1:
+        return np.arange(size)
+    expected = size * chance
+    positions = np.cumsum(rng.geometric(chance, size=int(expected + 6 * math.sqrt(expected) + 16))) - 1
+    while positions[-1] < size:
+        more = rng.geometric(chance, size=int(expected + 16))
+        positions = np.concatenate((positions, positions[-1] + np.cumsum(more)))
+    return positions[:np.searchsorted(positions, size)]
+
+
+def trinary_logic_update(pattern, perturbation_chance=0.01, rng=None):
     """
     Update the pattern using trinary logic rules.
     Each cell is updated based on a random neighbor's value.
     Introduces random perturbations for unpredictability.
+
+    Works on the whole grid as an int8 array: the grid is wrap-padded once
+    (toroidal edges), three random bits per cell pick which of the eight
+    neighbors it copies, and the picks are gathered in a single take.
     """
-    rows = len(pattern)
-    cols = len(pattern[0])
-    new_pattern = [[0] * cols for _ in range(rows)]
-
-    for y in range(rows):
-        for x in range(cols):
-            neighbors = [
-                pattern[(y - 1) % rows][(x - 1) % cols],  # Top-left
-                pattern[(y - 1) % rows][x],              # Top
-                pattern[(y - 1) % rows][(x + 1) % cols],  # Top-right
-                pattern[y][(x - 1) % cols],              # Left
-                pattern[y][(x + 1) % cols],              # Right
-                pattern[(y + 1) % rows][(x - 1) % cols],  # Bottom-left
-                pattern[(y + 1) % rows][x],              # Bottom
-                pattern[(y + 1) % rows][(x + 1) % cols]   # Bottom-right
-            ]
-            new_pattern[y][x] = random.choice(neighbors)
-
-            # Add random perturbation for unpredictability
-            if random.random() < perturbation_chance:
-                new_pattern[y][x] = random.choice([-1, 0, 1])
+    rng = _rng if rng is None else rng
+    pattern = np.asarray(pattern, dtype=np.int8)
+    rows, cols = pattern.shape
+    if pattern.shape not in _workspaces:
+        _workspaces[pattern.shape] = _UpdateWorkspace(rows, cols)
+    work = _workspaces[pattern.shape]
+    padded = work.pad(pattern)
+
+    # 0-7 -> top-left, top, top-right, left, right, bottom-left, bottom, bottom-right:
+    # the position in the 3x3 block around the cell, skipping the centre
+    random_bytes = rng.bit_generator.random_raw((rows * cols + 7) // 8).view(np.uint8)[:rows * cols]
+    block, block_row, index = work.block, work.block_row, work.index
+    np.bitwise_and(random_bytes.reshape(rows, cols), 7, out=block)
+    block += block >= 4
+    np.floor_divide(block, 3, out=block_row)
+    np.multiply(block_row, np.int32(work.width - 3), out=index)  # row * width + column, with column = block - 3 * row
+    index += block
+    index += work.cell_index
+    new_pattern = padded.take(index)
+
+    # Add random perturbation for unpredictability
+    perturbed = _perturbed_cells(rng, rows * cols, perturbation_chance)
+    new_pattern.ravel()[perturbed] = rng.integers(-1, 2, size=len(perturbed), dtype=np.int8)
     return new_pattern
 
 
-def draw_triangles(screen, triangles, pattern, rows, cols, color_offset, font, ascii_grid):
+def next_generation(pattern, ascii_grid, keep_ascii=False, rng=None):
     """
-    Draw the pattern using a grid of triangles with DOS ASCII characters.
+    Advance the pattern one generation with a random symmetry and pick new
+    ASCII characters. With `keep_ascii`, cells that kept their value keep
+    their character.
+    """
+    new_pattern = trinary_logic_update(pattern, perturbation_chance=0.02, rng=rng)
+    apply_symmetry(new_pattern, random.choice(SYMMETRY_TYPES), out=new_pattern)
+    rows, cols = new_pattern.shape
+    if keep_ascii:
+        ascii_grid = np.where(new_pattern != pattern, generate_ascii_grid(rows, cols, rng), ascii_grid)
+    else:
+        ascii_grid = generate_ascii_grid(rows, cols, rng)
+    return new_pattern, ascii_grid
+
+
+def _mix64(z):
     """
-    for i, triangle in enumerate(triangles):
-        # Determine the row and column based on the triangle index
-        row = (i // (cols * 2)) % rows
-        col = (i // 2) % cols
+    SplitMix64 finalizer: a bijective scramble of 64-bit words (Python int or uint64 array).
+    """
+    if isinstance(z, int):
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+        return z ^ (z >> 31)
+    z = (z ^ (z >> 30)) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> 27)) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> 31)
+
+
+def _stream_key(seed, generation, stream):
+    return _mix64(_mix64(_mix64(seed & _MASK64) ^ generation) ^ stream)
 
-        # Get the value from the pattern and calculate the color
-        value = pattern[row][col]
-        color = trinary_color(value, color_offset)
 
-        # Draw the triangle
-        pygame.draw.polygon(screen, color, triangle)
+def cell_words(seed, generation, stream, start, stop, cols):
+    """
+    Random 64-bit words for the cells of rows [start, stop) of a grid
+    `cols` wide. Each word depends only on (seed, generation, stream, cell),
+    so any split of the grid draws exactly the same numbers.
+    """
+    cells = np.arange(start * cols, stop * cols, dtype=np.uint64).reshape(stop - start, cols)
+    return _mix64(cells * np.uint64(0x9E3779B97F4A7C15) + np.uint64(_stream_key(seed, generation, stream)))
+
 
-        # Draw ASCII character at the triangle's center
-        if value != 0:
-            ascii_char = ascii_grid[row][col]
-            text = font.render(ascii_char, True, (255, 255, 255))
-            center_x = (triangle[0][0] + triangle[1][0] + triangle[2][0]) // 3
-            center_y = (triangle[0][1] + triangle[1][1] + triangle[2][1]) // 3
-            screen.blit(text, (center_x - 6, center_y - 6))
+def _choices(words, count):
+    # Top 24 bits scaled to 0..count-1
+    return ((words >> np.uint64(40)) * np.uint64(count)) >> np.uint64(24)
+
+
+def seeded_pattern(rows, cols, seed):
+    """
+    The initial pattern for `seed`, like generate_pattern but reproducible.
+    """
+    return _choices(cell_words(seed, 0, _PATTERN_STREAM, 0, rows, cols), 3).astype(np.int8) - 1
+
+
+def seeded_ascii_grid(rows, cols, seed, generation):
+    """
+    The ASCII character indices for one generation of `seed`.
+    """
+    return _choices(cell_words(seed, generation, _ASCII_STREAM, 0, rows, cols), len(DOS_ASCII_CHARS)).astype(np.uint8)
+
+
+def seeded_symmetry(seed, generation):
+    return SYMMETRY_TYPES[_stream_key(seed, generation, _SYMMETRY_STREAM) % len(SYMMETRY_TYPES)]
+
+
+def advance_rows(pattern, out, seed, generation, perturbation_chance, start, stop):
+    """
+    Write rows [start, stop) of `generation` into `out`, from the whole
+    previous-generation `pattern`. The same rule as trinary_logic_update,
+    but every cell's neighbor pick and perturbation come from its own
+    counter-based random word.
+    """
+    rows, cols = pattern.shape
+    threshold = np.uint64(min(int(perturbation_chance * 2 ** 32), 2 ** 32))
+    for band_start in range(start, stop, _BAND_ROWS):
+        band_stop = min(band_start + _BAND_ROWS, stop)
+        # Toroidal edges: the band plus one wrapped row/column on every side
+        padded = np.empty((band_stop - band_start + 2, cols + 2), dtype=np.int8)
+        padded[:, 1:-1] = pattern.take(np.arange(band_start - 1, band_stop + 1) % rows, axis=0)
+        padded[:, 0] = padded[:, -2]
+        padded[:, -1] = padded[:, 1]
+
+        words = cell_words(seed, generation, _UPDATE_STREAM, band_start, band_stop, cols)
+        # Low 3 bits pick one of the eight neighbors, as in trinary_logic_update
+        block = (words & np.uint64(7)).astype(np.intp)
+        block += block >= 4
+        index = (block // 3) * (cols - 1) + block  # row * (cols + 2) + column, with column = block - 3 * row
+        index += np.arange(band_stop - band_start)[:, None] * (cols + 2) + np.arange(cols)
+        new_rows = padded.ravel().take(index)
+
+        # Bits 8-39 decide the perturbation, the top 24 bits its value
+        perturbed = ((words >> np.uint64(8)) & np.uint64(0xFFFFFFFF)) < threshold
+        out[band_start:band_stop] = np.where(perturbed, _choices(words, 3).astype(np.int8) - 1, new_rows)
+
+
+def seeded_generation(pattern, seed, generation, perturbation_chance=0.02):
+    """
+    Compute `generation` from the previous pattern on one core: the seeded
+    update followed by the generation's symmetry.
+    """
+    pattern = np.asarray(pattern, dtype=np.int8)
+    new_pattern = np.empty_like(pattern)
+    advance_rows(pattern, new_pattern, seed, generation, perturbation_chance, 0, len(pattern))
+    return apply_symmetry(new_pattern, seeded_symmetry(seed, generation), out=new_pattern)
+
+
+def _attach_tiles(name, shape):
+    block = shared_memory.SharedMemory(name=name)
+    _tiles["buffers"] = (block, np.ndarray((2, *shape), dtype=np.int8, buffer=block.buf))
+
+
+def _advance_tile(source, seed, generation, perturbation_chance, start, stop):
+    buffers = _tiles["buffers"][1]
+    advance_rows(buffers[source], buffers[1 - source], seed, generation, perturbation_chance, start, stop)
+
+
+class TiledSimulation:
+    """
+    A seeded grid advanced across a process pool.
+
+    Both generations live in one shared memory double buffer. Each step,
+    every worker advances a band of rows from one half into the other, and
+    the symmetry is applied once the whole grid is done. Because every
+    cell draws from its own random stream, the result is bit-identical to
+    seeded_generation on one core, however the grid is split.
+    """
+
+    def __init__(self, rows, cols, seed, workers=None, perturbation_chance=0.02, pattern=None):
+        self.seed = seed
+        self.perturbation_chance = perturbation_chance
+        self.generation = 0
+        self.current = 0
+        self.block = shared_memory.SharedMemory(create=True, size=2 * rows * cols)
+        self.buffers = np.ndarray((2, rows, cols), dtype=np.int8, buffer=self.block.buf)
+        self.buffers[0] = seeded_pattern(rows, cols, seed) if pattern is None else pattern
+        workers = workers or os.cpu_count()
+        tiles = min(rows, workers * 2)
+        self.bands = [(rows * i // tiles, rows * (i + 1) // tiles) for i in range(tiles)]
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_attach_tiles,
+                                        initargs=(self.block.name, (rows, cols)))
+
+    @property
+    def pattern(self):
+        """
+        The current generation (a view; it is overwritten two steps later).
+        """
+        return self.buffers[self.current]
+
+    def step(self):
+        generation, source = self.generation + 1, self.current
+        tasks = [self.pool.submit(_advance_tile, source, self.seed, generation, self.perturbation_chance, start, stop)
+                 for start, stop in self.bands]
+        for task in tasks:
+            task.result()
+        target = self.buffers[1 - source]
+        apply_symmetry(target, seeded_symmetry(self.seed, generation), out=target)
+        self.generation, self.current = generation, 1 - source
+        return self.pattern
+
+    def close(self):
+        self.pool.shutdown()
+        del self.buffers
+        self.block.close()
+        self.block.unlink()
+
+
+class SimulationPipeline:
+    """
+    Computes generations in a background thread while the main thread draws.
+
+    The worker calls `step(state)` over and over and puts each new state on
+    a bounded queue, so it runs at most `depth` generations ahead of the
+    renderer. Every state is a fresh set of arrays, so a generation being
+    drawn is never written to by the next one. NumPy and pygame release the
+    GIL in their bulk operations, so simulation and drawing overlap and the
+    frame time approaches the larger of the two rather than their sum.
+    """
+
+    def __init__(self, step, state, depth=2):
+        self.step = step
+        self.queue = queue.Queue(maxsize=depth)
+        self.stopping = threading.Event()
+        self.error = None
+        self.thread = threading.Thread(target=self._worker, args=(state,), name="triss-simulation", daemon=True)
+        self.thread.start()
+
+    def get(self):
+        """
+        Return the next state, waiting for the worker if it is behind.
+        """
+        while True:
+            try:
+                return self.queue.get(timeout=0.1)
+            except queue.Empty:
+                if not self.thread.is_alive():
+                    raise RuntimeError("simulation worker stopped") from self.error
+
+    def close(self):
+        self.stopping.set()
+        self.thread.join()
+
+    def _worker(self, state):
+        try:
+            while not self.stopping.is_set():
+                state = self.step(state)
+                while not self.stopping.is_set():
+                    try:
+                        self.queue.put(state, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+        except Exception as e:
+            self.error = e
+
+
+class TriangleRenderer:
+    """
+    Palette-indexed rendering of the triangle grid.
+
+    The triangles from create_triangle_grid are rasterized once, with
+    pygame.draw.polygon in the original drawing order, into a map of which
+    cell owns each pixel. Cells are equal-sized tiles, so the map is stored
+    as one tile template plus the few pixels where a neighbouring cell's
+    triangle overlaps. Each frame then writes palette indices for the whole
+    grid in one broadcast add into an 8-bit surface, and color cycling only
+    swaps the palette.
+    """
+
+    # Palette slots: 0-2 are cell values -1, 0, 1 inside a triangle; 3-5 are the black gaps between them
+    OUTSIDE = 3
+
+    def __init__(self, triangles, rows, cols, size):
+        self.rows, self.cols = rows, cols
+        self.size = size
+        self.cell_width = size[0] // cols
+        self.cell_height = size[1] // rows
+        self.surface = pygame.Surface(size, depth=8)
+        self.surface.fill(1 + self.OUTSIDE)
+        self._rasterize(triangles)
+
+    def _rasterize(self, triangles):
+        # Paint cell index + 1 as a 24-bit color per triangle; 0 is left for the background
+        ids = pygame.Surface(self.size, depth=32)
+        ids.fill((0, 0, 0))
+        for i, triangle in enumerate(triangles):
+            row = (i // (self.cols * 2)) % self.rows
+            col = (i // 2) % self.cols
+            cell = row * self.cols + col + 1
+            pygame.draw.polygon(ids, ((cell >> 16) & 255, (cell >> 8) & 255, cell & 255), triangle)
+        red, green, blue = (pygame.surfarray.pixels_red(ids), pygame.surfarray.pixels_green(ids),
+                            pygame.surfarray.pixels_blue(ids))
+        cell_map = (red.astype(np.int64) << 16 | green.astype(np.int64) << 8 | blue) - 1  # (x, y); -1 = background
+        del red, green, blue
+
+        # Tile template: which pixels of a cell's w x h block its own triangles cover
+        width, height = self.cell_width * self.cols, self.cell_height * self.rows
+        x, y = np.arange(width), np.arange(height)
+        block_cell = (y[None, :] // self.cell_height) * self.cols + x[:, None] // self.cell_width
+        own = (cell_map[:width, :height] == block_cell).reshape(self.cols, self.cell_width, self.rows, self.cell_height)
+        self.tile = np.where(own.mean(axis=(0, 2)) >= 0.5, 0, self.OUTSIDE).astype(np.uint8)  # (w, h)
+        self.tile_rows = np.tile(self.tile.T, (1, self.cols))  # (h, grid width): the template across a row of cells
+
+        # Pixels the tile gets wrong: overlaps from neighbouring cells and the right/bottom edges
+        predicted = np.full(cell_map.shape, -1, dtype=np.int64)
+        predicted[:width, :height] = np.where(np.tile(self.tile, (self.cols, self.rows)) == 0, block_cell, -1)
+        self.exceptions = np.nonzero(predicted != cell_map)
+        self.exception_cells = cell_map[self.exceptions]  # -1 reads the background slot appended per frame
+
+    def palette(self, color_offset):
+        colors = [trinary_color(value, color_offset) for value in (-1, 0, 1)]
+        return colors + [(0, 0, 0)] * 3
+
+    def render(self, pattern, color_offset):
+        """
+        Return the 8-bit surface for `pattern` (rows x cols of -1/0/1) with
+        the palette for `color_offset`.
+        """
+        indices = (np.asarray(pattern, dtype=np.int8) + 1).astype(np.uint8)
+        pixels = pygame.surfarray.pixels2d(self.surface)  # (x, y); x is the contiguous axis
+        step_x, step_y = pixels.strides
+        # (cell row, row within the cell, x) view of the tiled region, so the inner loop runs along whole pixel rows
+        region = np.lib.stride_tricks.as_strided(
+            pixels, shape=(self.rows, self.cell_height, self.cols * self.cell_width),
+            strides=(self.cell_height * step_y, step_y, step_x),
+        )
+        np.add(np.repeat(indices, self.cell_width, axis=1)[:, None, :], self.tile_rows[None, :, :], out=region)
+        if len(self.exception_cells):
+            values = np.append(indices.ravel(), 1 + self.OUTSIDE)
+            pixels[self.exceptions] = values[self.exception_cells]
+        del pixels, region
+        self.surface.set_palette(self.palette(color_offset))
+        return self.surface
+
+
+class AsciiOverlay:
+    """
+    The DOS ASCII characters on a transparent overlay surface.
+
+    Every character of DOS_ASCII_CHARS is rendered once into a glyph atlas.
+    Each frame, only cells whose character or visibility changed are
+    cleared and re-blitted from the atlas in one Surface.blits call; the
+    rest of the overlay is left as it was, and only the bands of each cell
+    row that can hold glyphs are composited onto the screen. When glyphs
+    are bigger than their cells and could spill into a neighbour, the
+    overlay is simply rebuilt every frame.
+    """
+
+    def __init__(self, font, triangles, rows, cols, size):
+        self.rows, self.cols = rows, cols
+        self.cell_width = size[0] // cols
+        self.cell_height = size[1] // rows
+        glyphs = [font.render(char, True, (255, 255, 255)) for char in DOS_ASCII_CHARS]
+        self.atlas = pygame.Surface((sum(glyph.get_width() for glyph in glyphs),
+                                     max(glyph.get_height() for glyph in glyphs)), pygame.SRCALPHA)
+        self.areas = []
+        x = 0
+        for glyph in glyphs:
+            self.areas.append(pygame.Rect(x, 0, glyph.get_width(), glyph.get_height()))
+            self.atlas.blit(glyph, (x, 0))
+            x += glyph.get_width()
+        self.surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.state = np.full((rows, cols), -1, dtype=np.int16)  # Character shown per cell, -1 when hidden
+
+        # Top-left corner of the character at each triangle's center, two per cell
+        corners = (np.array(triangles).sum(axis=1) // 3 - 6).reshape(rows, cols, 2, 2)
+        self.positions = corners.tolist()
+        # Glyphs stay inside their own cell if both glyph boxes fit in the cell's block
+        origins = np.stack(np.meshgrid(np.arange(cols) * self.cell_width, np.arange(rows) * self.cell_height), axis=-1)
+        offsets = corners - origins[:, :, None, :]
+        glyph_width, glyph_height = max(area.width for area in self.areas), self.atlas.get_height()
+        self.contained = bool((offsets >= 0).all() and (offsets + (glyph_width, glyph_height)
+                                                          <= (self.cell_width, self.cell_height)).all())
+        if self.contained:
+            # Glyphs only ever occupy a band of each cell row; only those bands are cleared and composited
+            self.band_top = int(offsets[..., 1].min())
+            self.band_height = int(offsets[..., 1].max()) + glyph_height - self.band_top
+            self.bands = [pygame.Rect(0, row * self.cell_height + self.band_top, cols * self.cell_width,
+                                      self.band_height) for row in range(rows)]
+        else:
+            self.bands = [self.surface.get_rect()]
+
+    def draw(self, pattern, ascii_grid):
+        """
+        Bring the overlay up to date and return it.
+        """
+        state = np.where(np.asarray(pattern) != 0, np.asarray(ascii_grid, dtype=np.int16), np.int16(-1))
+        if self.contained:
+            changed = state != self.state
+            if not changed.any():
+                return self.surface
+            self._clear(changed)
+        else:
+            changed = np.ones(state.shape, dtype=bool)
+            self.surface.fill((0, 0, 0, 0))
+        self.state = state
+
+        atlas, areas, positions, cols = self.atlas, self.areas, self.positions, self.cols
+        blits = []
+        for cell in np.flatnonzero(changed & (state >= 0)).tolist():
+            row, col = divmod(cell, cols)
+            area = areas[state[row, col]]
+            left, right = positions[row][col]
+            blits.append((atlas, left, area))
+            blits.append((atlas, right, area))
+        self.surface.blits(blits, doreturn=False)
+        return self.surface
+
+    def _clear(self, changed):
+        # Zero the glyph band of every changed cell with one multiply along whole pixel rows
+        pixels = pygame.surfarray.pixels2d(self.surface)
+        step_x, step_y = pixels.strides
+        region = np.lib.stride_tricks.as_strided(
+            pixels[:, self.band_top:], shape=(self.rows, self.band_height, self.cols * self.cell_width),
+            strides=(self.cell_height * step_y, step_y, step_x),
+        )
+        keep = np.repeat(~changed, self.cell_width, axis=1).astype(pixels.dtype)
+        np.multiply(region, keep[:, None, :], out=region)
+        del pixels, region
+
+    def blit_to(self, screen):
+        screen.blits([(self.surface, band, band) for band in self.bands], doreturn=False)
+
+
+class DirtyRegions:
+    """
+    Screen rectangles that need repainting after a frame.
+
+    A cell is dirty when its value, its ASCII character or (for non-zero
+    cells) the palette changed since the last frame. Dirty cells along a
+    cell row are merged into runs, and each run becomes one rect covering
+    the cells' triangles (which reach one pixel into the next block) and
+    their glyphs, so the rects can be passed to pygame.display.update.
+    """
+
+    def __init__(self, triangles, overlay, rows, cols):
+        points = np.array(triangles).reshape(rows, cols, 6, 2)
+        left, top = points.min(axis=2).transpose(2, 0, 1)
+        right, bottom = points.max(axis=2).transpose(2, 0, 1) + 1  # Polygon edges are drawn inclusively
+        if not overlay.contained:
+            glyph_width, glyph_height = max(area.width for area in overlay.areas), overlay.atlas.get_height()
+            corners = np.array(overlay.positions)
+            left = np.minimum(left, corners[..., 0].min(axis=2))
+            top = np.minimum(top, corners[..., 1].min(axis=2))
+            right = np.maximum(right, corners[..., 0].max(axis=2) + glyph_width)
+            bottom = np.maximum(bottom, corners[..., 1].max(axis=2) + glyph_height)
+        self.left, self.right = left, np.maximum.accumulate(right, axis=1)  # Right edge of a run ending at each cell
+        self.top, self.bottom = top.min(axis=1), bottom.max(axis=1)
+        self.previous = None
+
+    def update(self, pattern, state, color_offset):
+        """
+        Record the new frame and return the rects that changed, or None when
+        the whole screen has to be redrawn (the first frame).
+        """
+        previous, self.previous = self.previous, (pattern.copy(), state.copy(), color_offset)
+        if previous is None:
+            return None
+        changed = (pattern != previous[0]) | (state != previous[1])
+        if color_offset != previous[2]:
+            changed |= pattern != 0
+
+        # Runs of dirty cells along each cell row: +1 where a run starts, -1 just past its end
+        edges = np.diff(changed.astype(np.int8), axis=1, prepend=0, append=0)
+        run_rows, starts = np.nonzero(edges == 1)
+        ends = np.nonzero(edges == -1)[1] - 1
+        left, right = self.left[run_rows, starts], self.right[run_rows, ends]
+        top, bottom = self.top[run_rows], self.bottom[run_rows]
+        return [pygame.Rect(x, y, width, height)
+                for x, y, width, height in zip(left.tolist(), top.tolist(), (right - left).tolist(),
+                                               (bottom - top).tolist())]
+
+
+def draw_triangles(screen, renderer, overlay, pattern, color_offset, ascii_grid):
+    """
+    Draw the pattern using a grid of triangles with DOS ASCII characters.
+    """
+    screen.blit(renderer.render(pattern, color_offset), (0, 0))
+    overlay.draw(pattern, ascii_grid)
+    overlay.blit_to(screen)
+
+
+def draw_dirty(screen, renderer, overlay, dirty, pattern, color_offset, ascii_grid):
+    """
+    Repaint only the parts of the screen whose cells changed, and return the
+    rects to pass to pygame.display.update (None after a full redraw).
+    """
+    surface = renderer.render(pattern, color_offset)
+    overlay.draw(pattern, ascii_grid)
+    rects = dirty.update(pattern, overlay.state, color_offset)
+    if rects is None:
+        screen.blit(surface, (0, 0))
+        overlay.blit_to(screen)
+        return None
+    # Triangles then glyphs per rect, so glyphs are never blended twice where rects overlap
+    screen.blits([(source, rect, rect) for rect in rects for source in (surface, overlay.surface)], doreturn=False)
+    return rects
 
 
 def main():
+    parser = argparse.ArgumentParser(description="DOS ASCII triangle screensaver.")
+    parser.add_argument("--dirty", action="store_true",
+                        help="Only repaint and push the cells that changed (lower CPU use on idle displays)")
+    parser.add_argument("--color-period", type=int,
+                        help="Frames per color cycling step (default: 1, or 30 with --dirty)")
+    parser.add_argument("--serial", action="store_true",
+                        help="Simulate on the main thread between frames instead of in a background thread")
+    parser.add_argument("--seed", type=int, help="Run the reproducible seeded simulation")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes to advance the seeded simulation with, a band of rows each")
+    parser.add_argument("--record", metavar="PATH",
+                        help="Record frames: a directory for PNGs, a .raw rgb24 stream, or a video file via ffmpeg")
+    parser.add_argument("--record-buffers", type=int, default=8,
+                        help="Frames that may wait for the encoder before new ones are dropped")
+    args = parser.parse_args()
+    color_period = args.color_period or (30 if args.dirty else 1)
+
     # Initialize Pygame
     pygame.init()
     info = pygame.display.Info()
@@ -158,12 +720,42 @@ def main():
     # Settings
     rows, cols = 40, 80  # Adjust density of triangles
     triangles = create_triangle_grid(rows, cols, screen_width, screen_height)
+    renderer = TriangleRenderer(triangles, rows, cols, (screen_width, screen_height))
+    overlay = AsciiOverlay(font, triangles, rows, cols, (screen_width, screen_height))
+    dirty = DirtyRegions(triangles, overlay, rows, cols) if args.dirty else None
     pattern = generate_pattern(rows, cols)
     ascii_grid = generate_ascii_grid(rows, cols)
     running = True
     color_offset = 0
-    symmetry_types = ["horizontal", "vertical", "radial"]
-
+    frame = 0
+
+    recorder = FrameRecorder.for_surface(args.record, screen, buffers=args.record_buffers) if args.record else None
+    tiles = None
+    if args.seed is None:
+        # Cells that kept their value keep their character in dirty mode, so they stay clean
+        def step(state):
+            return next_generation(*state, keep_ascii=dirty is not None)
+    else:
+        pattern = seeded_pattern(rows, cols, args.seed)
+        ascii_grid = seeded_ascii_grid(rows, cols, args.seed, 0)
+        if args.workers > 1:
+            tiles = TiledSimulation(rows, cols, args.seed, args.workers, pattern=pattern)
+        generation = 0
+
+        def step(state):
+            nonlocal generation
+            previous, ascii_grid = state
+            generation += 1
+            if tiles is None:
+                new_pattern = seeded_generation(previous, args.seed, generation)
+            else:
+                new_pattern = tiles.step().copy()  # The shared buffer is overwritten two steps later
+            new_ascii = seeded_ascii_grid(rows, cols, args.seed, generation)
+            if dirty is not None:
+                new_ascii = np.where(new_pattern != previous, new_ascii, ascii_grid)
+            return new_pattern, new_ascii
+
+    pipeline = None if args.serial else SimulationPipeline(step, (pattern, ascii_grid))
     try:
         while running:
             for event in pygame.event.get():
@@ -171,21 +763,39 @@ def main():
                     running = False  # Exit on any key press
 
             # Update pattern, apply symmetry, and add unpredictability
-            pattern = trinary_logic_update(pattern, perturbation_chance=0.02)
-            pattern = apply_symmetry(pattern, random.choice(symmetry_types))
-            ascii_grid = generate_ascii_grid(rows, cols)
+            if pipeline is None:
+                pattern, ascii_grid = step((pattern, ascii_grid))
+            else:
+                pattern, ascii_grid = pipeline.get()
 
             # Update color offset for smoother cycling
-            color_offset = (color_offset + 1) % 255
+            frame += 1
+            if frame % color_period == 0:
+                color_offset = (color_offset + 1) % 255
 
             # Draw updated pattern
-            screen.fill((0, 0, 0))  # Clear screen
-            draw_triangles(screen, triangles, pattern, rows, cols, color_offset, font, ascii_grid)
-            pygame.display.flip()
+            if dirty is None:
+                draw_triangles(screen, renderer, overlay, pattern, color_offset, ascii_grid)
+                pygame.display.flip()
+            else:
+                rects = draw_dirty(screen, renderer, overlay, dirty, pattern, color_offset, ascii_grid)
+                if rects is None:
+                    pygame.display.flip()
+                elif rects:
+                    pygame.display.update(rects)
+            if recorder is not None:
+                recorder.record(screen)
 
             # Limit to 30 frames per second
             clock.tick(30)
     finally:
+        if pipeline is not None:
+            pipeline.close()
+        if tiles is not None:
+            tiles.close()
+        if recorder is not None:
+            recorder.close()
+            print(f"Recorded {recorder.encoded} frames to {args.record}, dropped {recorder.dropped}")
         pygame.quit()
 
 
@@ -0,0 +1,183 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore
+from indicators import compute_indicators
+from strategy import (
+    BAR_CACHE_DIR, LONG_WINDOW, RSI_OVERBOUGHT, RSI_OVERSOLD, RSI_PERIOD, SHORT_WINDOW, TRADE_AMOUNT,
+    calculate_trade_size,
+)
+
+
+def signal_masks(price, vwap, sma_short, sma_long, rsi, rsi_overbought, rsi_oversold):
+    """
+    The trade_logic buy/sell conditions evaluated over whole arrays.
+    NaN indicators compare False, exactly like the live checks.
+    """
+    if rsi_oversold > rsi_overbought:
+        raise ValueError("Backtest requires RSI_OVERSOLD <= RSI_OVERBOUGHT.")
+    with np.errstate(invalid="ignore"):
+        buy = (price > vwap) & (sma_short > sma_long) & (rsi < rsi_oversold)
+        sell = (price < vwap) | (sma_short < sma_long) | (rsi > rsi_overbought)
+    return buy, sell
+
+
+def position_state(buy, sell):
+    """
+    Whether trade_logic would be long after each bar. Buy and sell are mutually
+    exclusive, so the state is simply the last signal seen (forward filled).
+    """
+    events = np.where(buy, 1, np.where(sell, 0, -1))
+    last_event = np.maximum.accumulate(np.where(events >= 0, np.arange(len(events)), -1))
+    return np.where(last_event >= 0, events[np.maximum(last_event, 0)], 0).astype(bool)
+
+
+def simulate(price, buy, sell, initial_cash, trade_amount=TRADE_AMOUNT, slippage_bps=0.0):
+    """
+    Fill every entry and exit at the signal bar's price (plus slippage) and
+    size buys with calculate_trade_size against the cash balance at the time.
+    Returns (entries, exits, shares, entry_prices, exit_prices, equity).
+    An open position at the end has exit index -1 and is marked to market.
+    """
+    long = position_state(buy, sell)
+    previous = np.concatenate(([False], long[:-1]))
+    entries = np.flatnonzero(long & ~previous)
+    exits = np.flatnonzero(~long & previous)
+    exits = np.concatenate((exits, np.full(len(entries) - len(exits), -1)))
+
+    slip = slippage_bps / 10_000
+    entry_prices = price[entries] * (1 + slip)
+    exit_prices = np.where(exits >= 0, price[exits] * (1 - slip), price[-1] if len(price) else np.nan)
+
+    # Sizing depends on the running balance, so walk the trades (not the bars)
+    shares = np.empty(len(entries))
+    cash_after = np.empty(2 * len(entries))
+    cash = initial_cash
+    for i in range(len(entries)):
+        trade_size = calculate_trade_size(cash, trade_amount)
+        shares[i] = trade_size / entry_prices[i]
+        cash -= trade_size
+        cash_after[2 * i] = cash
+        if exits[i] >= 0:
+            cash += shares[i] * exit_prices[i]
+        cash_after[2 * i + 1] = cash
+
+    # Cash and holdings per bar, from the number of fills at or before each bar
+    event_bars = np.empty(2 * len(entries), dtype=np.int64)
+    event_bars[0::2] = entries
+    event_bars[1::2] = np.where(exits >= 0, exits, len(price))
+    fills = np.searchsorted(event_bars, np.arange(len(price)), side="right")
+    cash_series = np.concatenate(([initial_cash], cash_after))[fills]
+    trade_index = np.maximum(fills - 1, 0) // 2
+    held = np.where(long, shares[trade_index] if len(shares) else 0.0, 0.0)
+    equity = cash_series + held * price
+    return entries, exits, shares, entry_prices, exit_prices, equity
+
+
+def trade_stats(entries, exits, shares, entry_prices, exit_prices, equity, initial_cash):
+    returns = exit_prices / entry_prices - 1 if len(entries) else np.empty(0)
+    closed = exits >= 0
+    bars_held = np.where(closed, exits, len(equity) - 1) - entries
+    peak = np.maximum.accumulate(equity) if len(equity) else equity
+    return {
+        "trades": int(len(entries)),
+        "closed_trades": int(closed.sum()),
+        "win_rate": float((returns[closed] > 0).mean()) if closed.any() else float("nan"),
+        "avg_trade_return": float(returns.mean()) if len(returns) else float("nan"),
+        "avg_bars_held": float(bars_held.mean()) if len(bars_held) else float("nan"),
+        "exposure": float(bars_held.sum() / len(equity)) if len(equity) else 0.0,
+        "turnover": float((shares * entry_prices).sum() + (shares * exit_prices)[closed].sum()),
+        "final_equity": float(equity[-1]) if len(equity) else initial_cash,
+        "total_return": float(equity[-1] / initial_cash - 1) if len(equity) else 0.0,
+        "max_drawdown": float((equity / peak - 1).min()) if len(equity) else 0.0,
+    }
+
+
+def run_backtest(data, short_window=SHORT_WINDOW, long_window=LONG_WINDOW, rsi_period=RSI_PERIOD,
+                 rsi_overbought=RSI_OVERBOUGHT, rsi_oversold=RSI_OVERSOLD,
+                 initial_cash=10_000.0, trade_amount=TRADE_AMOUNT, slippage_bps=0.0):
+    """
+    Backtest the trade_logic rules over an OHLCV frame.
+    Returns a dict with a `trades` DataFrame, an `equity` Series and `stats`.
+    """
+    indicators = compute_indicators(data, short_window, long_window, rsi_period)
+    price = data["Close"].to_numpy(dtype=float)
+    buy, sell = signal_masks(
+        price, indicators["VWAP"].to_numpy(), indicators["SMA_Short"].to_numpy(),
+        indicators["SMA_Long"].to_numpy(), indicators["RSI"].to_numpy(), rsi_overbought, rsi_oversold,
+    )
+    entries, exits, shares, entry_prices, exit_prices, equity = simulate(
+        price, buy, sell, initial_cash, trade_amount, slippage_bps
+    )
+
+    closed = exits >= 0
+    trades = pd.DataFrame({
+        "entry_time": data.index[entries],
+        "exit_time": pd.Series(data.index[np.where(closed, exits, 0)]).where(closed).to_numpy(),
+        "shares": shares,
+        "entry_price": entry_prices,
+        "exit_price": exit_prices,
+        "pnl": shares * (exit_prices - entry_prices),
+        "return": exit_prices / entry_prices - 1,
+        "closed": closed,
+    })
+    return {
+        "trades": trades,
+        "equity": pd.Series(equity, index=data.index, name="equity"),
+        "stats": trade_stats(entries, exits, shares, entry_prices, exit_prices, equity, initial_cash),
+    }
+
+
+def load_bars(csv_path=None, symbol=None, interval="1m"):
+    if csv_path:
+        data = pd.read_csv(csv_path, index_col=0)
+        # Mixed UTC offsets (e.g. across a DST change) only parse as UTC
+        data.index = pd.to_datetime(data.index, utc=True)
+        return data
+    return BarStore(BAR_CACHE_DIR).read(symbol, interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the trade_logic rules over historical bars.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="OHLCV CSV with a datetime index (yfinance layout)")
+    source.add_argument("--symbol", help="Read bars for this ticker from the local bar cache")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--short-window", type=int, default=SHORT_WINDOW)
+    parser.add_argument("--long-window", type=int, default=LONG_WINDOW)
+    parser.add_argument("--rsi-period", type=int, default=RSI_PERIOD)
+    parser.add_argument("--rsi-overbought", type=float, default=RSI_OVERBOUGHT)
+    parser.add_argument("--rsi-oversold", type=float, default=RSI_OVERSOLD)
+    parser.add_argument("--initial-cash", type=float, default=10_000.0)
+    parser.add_argument("--trade-amount", type=float, default=TRADE_AMOUNT)
+    parser.add_argument("--slippage-bps", type=float, default=0.0)
+    parser.add_argument("--trades-out", help="Write the trade list to this CSV")
+    parser.add_argument("--equity-out", help="Write the equity curve to this CSV")
+    args = parser.parse_args()
+
+    data = load_bars(args.csv, args.symbol, args.interval)
+    if data.empty:
+        print("No bars to backtest.")
+        return
+
+    started = time.perf_counter()
+    result = run_backtest(
+        data, args.short_window, args.long_window, args.rsi_period, args.rsi_overbought,
+        args.rsi_oversold, args.initial_cash, args.trade_amount, args.slippage_bps,
+    )
+    elapsed = time.perf_counter() - started
+
+    print(f"Backtested {len(data)} bars in {elapsed * 1000:.1f} ms")
+    for name, value in result["stats"].items():
+        print(f"  {name:>16}: {value:.4f}" if isinstance(value, float) else f"  {name:>16}: {value}")
+    if args.trades_out:
+        result["trades"].to_csv(args.trades_out, index=False)
+    if args.equity_out:
+        result["equity"].to_csv(args.equity_out)
+
+
+if __name__ == "__main__":
+    main()
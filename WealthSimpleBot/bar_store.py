@@ -0,0 +1,115 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+BAR_DTYPE = np.dtype([
+    ("timestamp", "<i8"),  # UTC nanoseconds
+    ("Open", "<f8"),
+    ("High", "<f8"),
+    ("Low", "<f8"),
+    ("Close", "<f8"),
+    ("Volume", "<f8"),
+])
+BAR_FIELDS = [name for name in BAR_DTYPE.names if name != "timestamp"]
+
+SPAN_UNITS = {"m": "min", "h": "h", "d": "D", "wk": "W"}
+
+
+def to_timedelta(spec):
+    """
+    A yfinance interval/period string ("1m", "90m", "1h", "1d", "5d", "1wk")
+    as a Timedelta.
+    """
+    number = spec.rstrip("abcdefghijklmnopqrstuvwxyz")
+    return pd.Timedelta(int(number), SPAN_UNITS[spec[len(number):]])
+
+
+def _utc_nanoseconds(index):
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    return index.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+
+class BarStore:
+    """
+    Append-only bar history, one memory-mapped record file per symbol/interval.
+    `<root>/<TICKER>_<interval>.bars` holds fixed-size BAR_DTYPE records in
+    timestamp order and a small `.json` sidecar remembers the index timezone.
+    """
+
+    def __init__(self, root="bar_cache"):
+        self.root = root
+
+    def _path(self, ticker, interval):
+        return os.path.join(self.root, f"{ticker.upper()}_{interval}.bars")
+
+    def _timezone(self, ticker, interval):
+        meta_path = self._path(ticker, interval) + ".json"
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            return json.load(f).get("tz")
+
+    def records(self, ticker, interval):
+        path = self._path(ticker, interval)
+        if not os.path.exists(path) or os.path.getsize(path) < BAR_DTYPE.itemsize:
+            return np.empty(0, dtype=BAR_DTYPE)
+        count = os.path.getsize(path) // BAR_DTYPE.itemsize
+        return np.memmap(path, dtype=BAR_DTYPE, mode="r", shape=(count,))
+
+    def last_timestamp(self, ticker, interval):
+        records = self.records(ticker, interval)
+        if len(records) == 0:
+            return None
+        return self._to_index(records["timestamp"][-1:], ticker, interval)[0]
+
+    def append(self, ticker, interval, data):
+        """
+        Append the rows of `data` that are newer than the last stored bar.
+        Returns the number of bars written.
+        """
+        if data is None or data.empty:
+            return 0
+        index = pd.DatetimeIndex(data.index)
+        timestamps = _utc_nanoseconds(index)
+        records = self.records(ticker, interval)
+        if len(records):
+            keep = timestamps > records["timestamp"][-1]
+            data, timestamps = data[keep], timestamps[keep]
+        if len(timestamps) == 0:
+            return 0
+
+        rows = np.empty(len(timestamps), dtype=BAR_DTYPE)
+        rows["timestamp"] = timestamps
+        for field in BAR_FIELDS:
+            rows[field] = data[field].to_numpy(dtype=float)
+
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(ticker, interval)
+        if not os.path.exists(path + ".json"):
+            with open(path + ".json", "w") as f:
+                json.dump({"tz": str(index.tz) if index.tz is not None else None}, f)
+        with open(path, "ab") as f:
+            f.write(rows.tobytes())
+        return len(rows)
+
+    def read(self, ticker, interval, since=None):
+        """
+        Return stored bars (optionally only those at or after `since`) as an
+        OHLCV DataFrame indexed like the yfinance download they came from.
+        """
+        records = self.records(ticker, interval)
+        if since is not None and len(records):
+            since_ns = _utc_nanoseconds(pd.DatetimeIndex([since]))[0]
+            records = records[np.searchsorted(records["timestamp"], since_ns, side="left"):]
+        return pd.DataFrame({field: np.array(records[field]) for field in BAR_FIELDS},
+                            index=self._to_index(records["timestamp"], ticker, interval))
+
+    def _to_index(self, timestamps, ticker, interval):
+        tz = self._timezone(ticker, interval)
+        index = pd.DatetimeIndex(np.asarray(timestamps, dtype="datetime64[ns]"))
+        if tz is not None:
+            index = index.tz_localize("UTC").tz_convert(tz)
+        return index
@@ -0,0 +1,186 @@
+import logging
+import random
+import threading
+import time
+
+try:
+    import requests
+    import urllib3
+except ImportError:  # Only the requests-based Wealthsimple client raises these
+    requests = None
+
+# HTTP statuses meaning the session expired or was revoked
+SESSION_STATUS_CODES = (401, 403)
+
+
+def is_session_error(error):
+    """
+    Whether `error` means the session is no longer valid, so logging in again
+    can help. Rejected orders, unknown symbols and outages are not.
+    """
+    if isinstance(error, PermissionError):
+        return True
+    return getattr(getattr(error, "response", None), "status_code", None) in SESSION_STATUS_CODES
+
+
+def request_never_sent(error):
+    """
+    Whether `error` means the request never reached the broker: the
+    connection was refused or could not be set up. Only then is sending it
+    again sure not to duplicate it.
+    """
+    if isinstance(error, ConnectionRefusedError):
+        return True
+    if requests is None:
+        return False
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        # requests wraps urllib3's MaxRetryError, whose reason is the underlying failure
+        reason = getattr(error.args[0], "reason", error.args[0])
+        return isinstance(reason, (urllib3.exceptions.NewConnectionError, urllib3.exceptions.ConnectTimeoutError,
+                                   ConnectionRefusedError))
+    return False
+
+
+class BrokerClient:
+    """
+    Facade over a broker session (the Wealthsimple client or MockBroker).
+
+    Keeps one authenticated session from `login()` and logs in again when a
+    call fails because the session expired (see is_session_error). Balances and positions are cached per account for a short TTL
+    and dropped as soon as we place an order on that account, so our own fills
+    are always visible on the next read. Exposes the same methods as the
+    underlying client, so it can be passed anywhere `ws` is used.
+    """
+
+    def __init__(self, login, ttl=5.0, clock=time.monotonic):
+        self.login = login
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.RLock()
+        self.session = login()
+        self.logins = 1
+        self.account_ids = {}
+        self.cache = {}  # (kind, account_id) -> (expires_at, value)
+
+    def relogin(self):
+        with self.lock:
+            logging.warning("Broker session failed; logging in again.")
+            self.session = self.login()
+            self.logins += 1
+            self.cache.clear()
+
+    def _call(self, name, *args, retry=True, **kwargs):
+        try:
+            return getattr(self.session, name)(*args, **kwargs)
+        except Exception as e:
+            if not is_session_error(e):
+                raise
+            try:
+                self.relogin()
+            except Exception as login_error:
+                # The caller needs the call's own error, not the login's
+                logging.error(f"Re-login after failed broker call {name} failed: {login_error}")
+                raise e
+            if not retry:
+                raise
+            logging.warning(f"Broker call {name} failed ({e}); retrying after re-login.")
+        return getattr(self.session, name)(*args, **kwargs)
+
+    def _cached(self, kind, account_id):
+        with self.lock:
+            entry = self.cache.get((kind, account_id))
+            if entry and entry[0] > self.clock():
+                return entry[1]
+        value = self._call(kind, account_id)
+        with self.lock:
+            self.cache[(kind, account_id)] = (self.clock() + self.ttl, value)
+        return value
+
+    def invalidate(self, account_id=None):
+        with self.lock:
+            if account_id is None:
+                self.cache.clear()
+            else:
+                for key in [key for key in self.cache if key[1] == account_id]:
+                    del self.cache[key]
+
+    def get_account_id(self, account_name):
+        if account_name not in self.account_ids:
+            self.account_ids[account_name] = self._call("get_account_id", account_name)
+        return self.account_ids[account_name]
+
+    def get_balance(self, account_id):
+        return self._cached("get_balance", account_id)
+
+    def get_positions(self, account_id):
+        return self._cached("get_positions", account_id)
+
+    def place_order(self, account_id, **kwargs):
+        # Never resubmit an order blindly: a failure may have happened after the broker accepted it
+        try:
+            return self._call("place_order", account_id=account_id, retry=False, **kwargs)
+        finally:
+            self.invalidate(account_id)
+
+
+class MockBroker:
+    """
+    In-process stand-in for the Wealthsimple client with configurable latency.
+    Buys are dollar amounts and sells are share quantities, matching how
+    trade_logic sizes orders. Fills happen at `price_source(symbol)`.
+    """
+
+    def __init__(self, cash=10_000.0, latency=0.0, price_source=None, failure_rate=0.0, seed=None,
+                 account_name="Personal Account"):
+        self.latency = latency
+        self.price_source = price_source or (lambda symbol: 100.0)
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.account_name = account_name
+        self.cash = cash
+        self.holdings = {}
+        self.fills = []
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def _request(self, name):
+        with self.lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            # Fails before the request is handled, so it is always safe to retry
+            raise ConnectionRefusedError(f"Mock broker: {name} failed")
+
+    def get_account_id(self, account_name):
+        self._request("get_account_id")
+        return "mock-account" if account_name == self.account_name else None
+
+    def get_balance(self, account_id):
+        self._request("get_balance")
+        return {"available": self.cash}
+
+    def get_positions(self, account_id):
+        self._request("get_positions")
+        with self.lock:
+            return [{"symbol": symbol, "quantity": quantity} for symbol, quantity in self.holdings.items() if quantity]
+
+    def place_order(self, account_id, symbol, amount, order_type):
+        self._request("place_order")
+        price = self.price_source(symbol)
+        with self.lock:
+            if order_type == "buy":
+                amount = min(amount, self.cash)
+                quantity = amount / price
+                self.cash -= amount
+                self.holdings[symbol] = self.holdings.get(symbol, 0.0) + quantity
+            elif order_type == "sell":
+                quantity = min(amount, self.holdings.get(symbol, 0.0))
+                self.cash += quantity * price
+                self.holdings[symbol] = self.holdings.get(symbol, 0.0) - quantity
+            else:
+                raise ValueError(f"Unknown order type '{order_type}'.")
+            self.fills.append({"symbol": symbol, "side": order_type, "quantity": quantity, "price": price})
+        return self.fills[-1]
@@ -0,0 +1,229 @@
+import datetime
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+INDICATOR_COLUMNS = ["SMA_Short", "SMA_Long", "RSI", "VWAP"]
+
+
+class RollingSMA:
+    """
+    Simple moving average over the last `window` values, updated in O(1).
+    The running sum is re-derived from the window once per `window` updates
+    so floating-point drift cannot build up over a long session.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.updates = 0
+
+    def update(self, value):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self.total = math.fsum(self.values)
+        if len(self.values) < self.window:
+            return float("nan")
+        return self.total / self.window
+
+    def to_state(self):
+        return {"window": self.window, "values": list(self.values), "updates": self.updates}
+
+    @classmethod
+    def from_state(cls, state):
+        sma = cls(state["window"])
+        sma.values.extend(state["values"])
+        sma.total = math.fsum(sma.values)
+        sma.updates = state["updates"]
+        return sma
+
+
+class WilderRSI:
+    """
+    Wilder's RSI using the recursive smoothing avg = avg + (x - avg) / period.
+    Matches pandas' ewm(alpha=1/period, adjust=False, min_periods=period).
+    """
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.count = 0
+
+    def update(self, close):
+        if self.prev_close is None:
+            self.prev_close = close
+            return float("nan")
+        change = close - self.prev_close
+        self.prev_close = close
+        gain = max(change, 0.0)
+        loss = max(-change, 0.0)
+        if self.count == 0:
+            self.avg_gain, self.avg_loss = gain, loss
+        else:
+            self.avg_gain += (gain - self.avg_gain) / self.period
+            self.avg_loss += (loss - self.avg_loss) / self.period
+        self.count += 1
+        if self.count < self.period:
+            return float("nan")
+        if self.avg_loss == 0:
+            return 100.0 if self.avg_gain > 0 else float("nan")
+        return 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+
+    def to_state(self):
+        return {"period": self.period, "prev_close": self.prev_close, "avg_gain": self.avg_gain,
+                "avg_loss": self.avg_loss, "count": self.count}
+
+    @classmethod
+    def from_state(cls, state):
+        rsi = cls(state["period"])
+        rsi.prev_close, rsi.avg_gain, rsi.avg_loss, rsi.count = (
+            state["prev_close"], state["avg_gain"], state["avg_loss"], state["count"])
+        return rsi
+
+
+class SessionVWAP:
+    """
+    Volume-weighted average price that resets at the start of each trading day.
+    """
+
+    def __init__(self):
+        self.session = None
+        self.cum_pv = 0.0
+        self.cum_volume = 0.0
+
+    def update(self, timestamp, price, volume):
+        session = timestamp.date()
+        if session != self.session:
+            self.session = session
+            self.cum_pv = 0.0
+            self.cum_volume = 0.0
+        self.cum_pv += price * volume
+        self.cum_volume += volume
+        if self.cum_volume == 0:
+            return float("nan")
+        return self.cum_pv / self.cum_volume
+
+    def to_state(self):
+        return {"session": self.session.isoformat() if self.session else None,
+                "cum_pv": self.cum_pv, "cum_volume": self.cum_volume}
+
+    @classmethod
+    def from_state(cls, state):
+        vwap = cls()
+        vwap.session = datetime.date.fromisoformat(state["session"]) if state["session"] else None
+        vwap.cum_pv, vwap.cum_volume = state["cum_pv"], state["cum_volume"]
+        return vwap
+
+
+class IndicatorEngine:
+    """
+    Keeps SMA_Short, SMA_Long, RSI and VWAP up to date one bar at a time.
+    Bars at or before `last_timestamp` are ignored, so the same frame can be
+    passed in every cycle and only the new bars cost anything.
+    """
+
+    def __init__(self, short_window, long_window, rsi_period=14):
+        self.sma_short = RollingSMA(short_window)
+        self.sma_long = RollingSMA(long_window)
+        self.rsi = WilderRSI(rsi_period)
+        self.vwap = SessionVWAP()
+        self.last_timestamp = None
+        self.latest = dict.fromkeys(INDICATOR_COLUMNS, float("nan"))
+
+    def update(self, timestamp, close, volume, vwap_price=None):
+        # vwap_price is the bar's own VWAP when the bar was built from smaller ones
+        self.latest = {
+            "SMA_Short": self.sma_short.update(close),
+            "SMA_Long": self.sma_long.update(close),
+            "RSI": self.rsi.update(close),
+            "VWAP": self.vwap.update(timestamp, close if vwap_price is None else vwap_price, volume),
+        }
+        self.last_timestamp = timestamp
+        return self.latest
+
+    def update_frame(self, data):
+        """
+        Feed the bars of `data` newer than the last one seen and write the
+        indicator columns for those rows. Older rows keep their existing
+        values (NaN if the frame never had them), except the row of the last
+        bar seen, which is filled from `latest` so a fresh frame with no new
+        bars still ends in current indicators. `data` must be time-ordered.
+        """
+        index = data.index
+        start = 0 if self.last_timestamp is None else index.searchsorted(self.last_timestamp, side="right")
+        values = np.full((len(data), len(INDICATOR_COLUMNS)), np.nan)
+        present = [column for column in INDICATOR_COLUMNS if column in data.columns]
+        if present:
+            values[:, [INDICATOR_COLUMNS.index(column) for column in present]] = data[present].to_numpy(dtype=float)
+        if start > 0 and index[start - 1] == self.last_timestamp and np.isnan(values[start - 1]).all():
+            values[start - 1] = [self.latest[column] for column in INDICATOR_COLUMNS]
+
+        closes = data["Close"].to_numpy(dtype=float)
+        volumes = data["Volume"].to_numpy(dtype=float)
+        for i in range(start, len(data)):
+            if math.isnan(closes[i]):
+                values[i] = np.nan
+                continue
+            snapshot = self.update(index[i], closes[i], 0.0 if math.isnan(volumes[i]) else volumes[i])
+            values[i] = [snapshot[column] for column in INDICATOR_COLUMNS]
+        data[INDICATOR_COLUMNS] = values
+        return data
+
+    def to_state(self):
+        """
+        JSON-serialisable state, enough to carry on from the last bar seen.
+        """
+        return {
+            "sma_short": self.sma_short.to_state(),
+            "sma_long": self.sma_long.to_state(),
+            "rsi": self.rsi.to_state(),
+            "vwap": self.vwap.to_state(),
+            "last_timestamp": self.last_timestamp.isoformat() if self.last_timestamp is not None else None,
+            "latest": self.latest,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        engine = cls.__new__(cls)
+        engine.sma_short = RollingSMA.from_state(state["sma_short"])
+        engine.sma_long = RollingSMA.from_state(state["sma_long"])
+        engine.rsi = WilderRSI.from_state(state["rsi"])
+        engine.vwap = SessionVWAP.from_state(state["vwap"])
+        engine.last_timestamp = pd.Timestamp(state["last_timestamp"]) if state["last_timestamp"] else None
+        engine.latest = state["latest"]
+        return engine
+
+    def matches(self, short_window, long_window, rsi_period):
+        return (self.sma_short.window, self.sma_long.window, self.rsi.period) == (short_window, long_window, rsi_period)
+
+
+def compute_indicators(data, short_window, long_window, rsi_period=14):
+    """
+    Full pandas recompute of the IndicatorEngine columns, for checking the
+    incremental values and for vectorised work over history.
+    """
+    close = data["Close"].astype(float)
+    volume = data["Volume"].astype(float).fillna(0.0)
+    result = pd.DataFrame(index=data.index)
+    result["SMA_Short"] = close.rolling(short_window).mean()
+    result["SMA_Long"] = close.rolling(long_window).mean()
+
+    change = close.diff()
+    avg_gain = change.clip(lower=0).ewm(alpha=1 / rsi_period, adjust=False, min_periods=rsi_period).mean()
+    avg_loss = (-change).clip(lower=0).ewm(alpha=1 / rsi_period, adjust=False, min_periods=rsi_period).mean()
+    result["RSI"] = 100 - 100 / (1 + avg_gain / avg_loss)
+
+    sessions = data.index.date
+    pv = (close * volume).groupby(sessions).cumsum()
+    cum_volume = volume.groupby(sessions).cumsum()
+    result["VWAP"] = pv / cum_volume.replace(0, np.nan)
+    return result
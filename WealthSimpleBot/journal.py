@@ -0,0 +1,188 @@
+import glob
+import logging
+import os
+import queue
+import threading
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Journal falls back to CSV segments
+    pa = None
+
+# Column name -> type for every journal table. Times are UTC nanoseconds.
+TABLES = {
+    "decisions": {
+        "time": "timestamp", "bar_time": "timestamp", "ticker": "string", "price": "float64",
+        "sma_short": "float64", "sma_long": "float64", "vwap": "float64", "rsi": "float64",
+        "position": "string", "signal": "string",
+    },
+    "orders": {
+        "time": "timestamp", "ticker": "string", "side": "string", "size": "float64",
+        "status": "string", "error": "string",
+    },
+}
+EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv"}
+
+
+def _arrow_type(name):
+    return {"timestamp": pa.timestamp("ns", tz="UTC"), "string": pa.string(), "float64": pa.float64()}[name]
+
+
+class TradeJournal:
+    """
+    Columnar journal of decisions and orders.
+
+    `record` only puts a tuple on a queue; a background thread batches rows
+    into typed columns and appends them to the open segment of each table
+    every `segment_rows` rows or `flush_interval` seconds, whichever comes
+    first. Each flush is one Arrow IPC record batch or Parquet row group
+    (CSV rows when pyarrow is not installed). A table's segment is closed and
+    a new one started every `rotate_interval` seconds. `load_journal` reads
+    the segments back into one DataFrame.
+    """
+
+    def __init__(self, directory="journal", fmt="arrow", segment_rows=10_000, flush_interval=5.0,
+                 rotate_interval=3600.0):
+        if pa is None and fmt != "csv":
+            logging.warning("pyarrow is not installed; writing the journal as CSV segments.")
+            fmt = "csv"
+        self.directory = directory
+        self.fmt = fmt
+        self.segment_rows = segment_rows
+        self.flush_interval = flush_interval
+        self.rotate_interval = rotate_interval
+        self.queue = queue.SimpleQueue()
+        self.buffers = {table: [] for table in TABLES}
+        self.writers = {}  # table -> (path, writer, opened_at)
+        self.segments = 0
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def record(self, table, **row):
+        if self.thread is None:
+            self._start()
+        self.queue.put((table, time.time_ns(), row))
+
+    def record_decision(self, **row):
+        self.record("decisions", **row)
+
+    def record_order(self, **row):
+        self.record("orders", **row)
+
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def _start(self):
+        with self.lock:
+            if self.thread is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self.thread = threading.Thread(target=self._run, name="trade-journal", daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self.queue.get(timeout=max(0.0, self.flush_interval - (time.monotonic() - last_flush)))
+            except queue.Empty:
+                item = ()
+            if item is None:
+                self._flush_all()
+                for table in list(self.writers):
+                    self._close_segment(table)
+                return
+            if item:
+                table, timestamp, row = item
+                row.setdefault("time", timestamp)
+                self.buffers[table].append(row)
+                if len(self.buffers[table]) >= self.segment_rows:
+                    self._flush(table)
+            if time.monotonic() - last_flush >= self.flush_interval:
+                self._flush_all()
+                last_flush = time.monotonic()
+
+    def _flush_all(self):
+        for table in TABLES:
+            self._flush(table)
+
+    def _open_segment(self, table, schema):
+        self.segments += 1
+        path = os.path.join(
+            self.directory,
+            f"{table}-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{self.segments:06d}{EXTENSIONS[self.fmt]}",
+        )
+        if self.fmt == "csv":
+            writer = open(path, "w", newline="")
+        elif self.fmt == "arrow":
+            # The stream format needs no footer, so a segment cut short by a crash still reads back
+            writer = pa.ipc.new_stream(path, schema, options=pa.ipc.IpcWriteOptions(compression="lz4"))
+        else:
+            writer = pq.ParquetWriter(path, schema, compression="zstd")
+        self.writers[table] = (path, writer, time.monotonic())
+
+    def _close_segment(self, table):
+        path, writer, _ = self.writers.pop(table)
+        try:
+            writer.close()
+        except Exception as e:
+            logging.error(f"Error closing journal segment {path}: {e}")
+
+    def _flush(self, table):
+        rows, self.buffers[table] = self.buffers[table], []
+        if not rows:
+            return
+        columns = TABLES[table]
+        data = {name: [row.get(name) for row in rows] for name in columns}
+        schema = None if self.fmt == "csv" else pa.schema([(name, _arrow_type(kind)) for name, kind in columns.items()])
+        if table in self.writers and time.monotonic() - self.writers[table][2] >= self.rotate_interval:
+            self._close_segment(table)
+        try:
+            if table not in self.writers:
+                self._open_segment(table, schema)
+            path, writer, _ = self.writers[table]
+            if self.fmt == "csv":
+                frame = pd.DataFrame(data, columns=list(columns))
+                for name in (name for name, kind in columns.items() if kind == "timestamp"):
+                    frame[name] = pd.to_datetime(frame[name], unit="ns", utc=True)
+                frame.to_csv(writer, index=False, header=writer.tell() == 0)
+                writer.flush()
+                return
+            batch = pa.record_batch(
+                [pa.array(data[name], type=schema.field(name).type) for name in columns], schema=schema
+            )
+            if self.fmt == "arrow":
+                writer.write_batch(batch)
+            else:
+                writer.write_batch(batch, row_group_size=len(rows))
+        except Exception as e:
+            logging.error(f"Error writing {table} to the journal: {e}")
+
+
+def load_journal(table, directory="journal"):
+    """
+    Concatenate every segment of `table` into one time-ordered DataFrame.
+    """
+    timestamps = [name for name, kind in TABLES[table].items() if kind == "timestamp"]
+    frames = []
+    for path in sorted(glob.glob(os.path.join(directory, f"{table}-*"))):
+        try:
+            if path.endswith(".parquet"):
+                frames.append(pd.read_parquet(path))
+            elif path.endswith(".arrow"):
+                with pa.ipc.open_stream(path) as reader:
+                    frames.append(reader.read_pandas())
+            elif path.endswith(".csv"):
+                frames.append(pd.read_csv(path, parse_dates=timestamps))
+        except Exception as e:
+            # A Parquet segment only gets its footer when it is closed
+            logging.warning(f"Skipping journal segment {path} (still open or truncated): {e}")
+    if not frames:
+        return pd.DataFrame(columns=list(TABLES[table]))
+    return pd.concat(frames, ignore_index=True).sort_values("time", ignore_index=True)
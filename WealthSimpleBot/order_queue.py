@@ -0,0 +1,175 @@
+import logging
+import queue
+import threading
+import time
+
+from broker import request_never_sent
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second on average with bursts of up to `burst`.
+    """
+
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = burst
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+
+class OrderQueue:
+    """
+    Non-blocking order pipeline.
+
+    `submit` only records the order. Until an order is placed or given up,
+    its size stays in a per-account/ticker/side ledger (`pending`), so the
+    caller can size new orders against cash and shares already committed. Orders for the same account, symbol and
+    side submitted before the next `flush` are merged into one (sizes summed).
+    `flush` hands the merged orders to a pool of worker threads, which respect
+    a per-account rate limit and retry failures with exponential backoff.
+    Only errors for which `retryable(error)` is true are retried: they must
+    mean the broker never saw the order (by default, a failed connect).
+    Anything else (a timeout, a dropped response) may have come after the
+    order was accepted, so it is reported as failed, not resubmitted.
+    """
+
+    def __init__(self, workers=4, rate_per_second=5.0, burst=5, max_retries=3, backoff=0.5,
+                 on_result=None, retryable=request_never_sent):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_retries = max_retries
+        self.retryable = retryable
+        self.backoff = backoff
+        self.on_result = on_result
+        self.pending_orders = {}
+        self.ledger = {}  # (account_id, ticker, side) -> size submitted but not yet placed or given up
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.work = queue.Queue()
+        self.stats = {"submitted": 0, "merged": 0, "placed": 0, "failed": 0, "retries": 0}
+        self.threads = [threading.Thread(target=self._worker, name=f"order-worker-{i}", daemon=True)
+                        for i in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, ws, account_id, ticker, size, order_type):
+        key = (account_id, ticker, order_type)
+        with self.lock:
+            self.stats["submitted"] += 1
+            self.ledger[key] = self.ledger.get(key, 0) + size
+            if key in self.pending_orders:
+                self.stats["merged"] += 1
+                self.pending_orders[key]["size"] += size
+            else:
+                self.pending_orders[key] = {"ws": ws, "account_id": account_id, "ticker": ticker,
+                                            "size": size, "order_type": order_type}
+
+    def pending(self, account_id, ticker=None, order_type=None):
+        """
+        Total size of the orders submitted for `account_id` that have not
+        been placed or given up yet, optionally only for one ticker or side.
+        Buys are dollar amounts and sells share quantities.
+        """
+        with self.lock:
+            return sum(size for (account, symbol, side), size in self.ledger.items()
+                       if account == account_id and ticker in (None, symbol) and order_type in (None, side))
+
+    def flush(self):
+        with self.lock:
+            orders, self.pending_orders = list(self.pending_orders.values()), {}
+        for order in orders:
+            self.work.put(order)
+        return len(orders)
+
+    def in_flight(self):
+        return self.work.unfinished_tasks
+
+    def join(self):
+        self.work.join()
+
+    def close(self):
+        self.flush()
+        for _ in self.threads:
+            self.work.put(None)
+        for thread in self.threads:
+            thread.join()
+
+    def _bucket(self, account_id):
+        with self.lock:
+            if account_id not in self.buckets:
+                self.buckets[account_id] = TokenBucket(self.rate_per_second, self.burst)
+            return self.buckets[account_id]
+
+    def _worker(self):
+        while True:
+            order = self.work.get()
+            try:
+                if order is None:
+                    return
+                self._place(order)
+            finally:
+                self.work.task_done()
+
+    def _place(self, order):
+        bucket = self._bucket(order["account_id"])
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            try:
+                order["ws"].place_order(
+                    account_id=order["account_id"],
+                    symbol=order["ticker"],
+                    amount=order["size"],
+                    order_type=order["order_type"]
+                )
+            except Exception as e:
+                if attempt == self.max_retries or not self.retryable(e):
+                    with self.lock:
+                        self.stats["failed"] += 1
+                        self._release(order)
+                    logging.error(f"Giving up on {order['order_type']} order for {order['ticker']} "
+                                  f"after {attempt + 1} attempts: {e}")
+                    self._report(order, e)
+                    return
+                with self.lock:
+                    self.stats["retries"] += 1
+                delay = self.backoff * 2 ** attempt
+                logging.warning(f"Error placing {order['order_type']} order for {order['ticker']} ({e}); "
+                                f"retrying in {delay:.2f}s.")
+                time.sleep(delay)
+            else:
+                with self.lock:
+                    self.stats["placed"] += 1
+                    self._release(order)
+                logging.info(f"Placed {order['order_type']} order for {order['ticker']} of size {order['size']}.")
+                self._report(order, None)
+                return
+
+    def _release(self, order):
+        # Called with the lock held
+        key = (order["account_id"], order["ticker"], order["order_type"])
+        remaining = self.ledger.pop(key, 0) - order["size"]
+        if remaining > 1e-9:
+            self.ledger[key] = remaining
+
+    def _report(self, order, error):
+        if self.on_result is not None:
+            try:
+                self.on_result(order, error)
+            except Exception as e:
+                logging.error(f"Order result callback failed: {e}")
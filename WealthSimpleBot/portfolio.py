@@ -0,0 +1,54 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def split_by_ticker(data, tickers):
+    """
+    Split a (possibly multi-ticker) yfinance download into one OHLCV frame
+    per ticker. Handles both `group_by="ticker"` and the default column layout.
+    """
+    if data is None or data.empty:
+        return {}
+    if not isinstance(data.columns, pd.MultiIndex):
+        return {tickers[0]: data} if len(tickers) == 1 else {}
+
+    level = 0 if set(tickers) & set(data.columns.get_level_values(0)) else 1
+    available = set(data.columns.get_level_values(level))
+    frames = {}
+    for ticker in tickers:
+        if ticker not in available:
+            continue
+        frame = data.xs(ticker, axis=1, level=level).dropna(how="all")
+        if not frame.empty:
+            frames[ticker] = frame
+    return frames
+
+
+def batch_download(tickers, fetch, batch_size=100, max_workers=8, group=None):
+    """
+    Download `tickers` in batches of `batch_size`, running up to `max_workers`
+    batches concurrently. `fetch(batch)` returns one yfinance-style frame for
+    the whole batch. With `group`, only tickers with the same `group(ticker)`
+    share a batch. Returns a dict of ticker -> frame; failed batches are logged
+    and left out.
+    """
+    frames = {}
+    groups = {}
+    for ticker in tickers:
+        groups.setdefault(group(ticker) if group else None, []).append(ticker)
+    batches = [batch for members in groups.values() for batch in chunked(members, batch_size)]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as pool:
+        futures = {pool.submit(fetch, batch): batch for batch in batches}
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                frames.update(split_by_ticker(future.result(), batch))
+            except Exception as e:
+                logging.error(f"Error downloading batch {batch[0]}..{batch[-1]} ({len(batch)} symbols): {e}")
+    return frames
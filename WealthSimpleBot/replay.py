@@ -0,0 +1,132 @@
+import argparse
+import logging
+import tempfile
+import time
+
+import tradeing_bot as bot
+from backtest import load_bars
+from bar_store import BarStore, to_timedelta
+from broker import BrokerClient, MockBroker
+from journal import TradeJournal
+from order_queue import OrderQueue
+from scheduler import CycleTimer
+
+
+class ReplayDownloader:
+    """
+    Stands in for yf.download over a recorded OHLCV frame. Only bars that
+    have closed by the replay clock are visible, like a live download.
+    """
+
+    def __init__(self, data, interval):
+        self.data = data
+        self.interval = to_timedelta(interval)
+        self.closes = data.index + self.interval
+        self.visible = 0
+
+    def advance(self, count):
+        self.visible = count
+
+    def __call__(self, tickers, period=None, start=None, interval=None, **kwargs):
+        end = self.visible
+        if start is not None:
+            begin = self.data.index.searchsorted(start, side="left")
+        else:
+            begin = self.data.index.searchsorted(self.closes[end - 1] - to_timedelta(period), side="left")
+        return self.data.iloc[begin:end]
+
+
+def replay(data, ticker, interval="1m", speed=0.0, cash=10_000.0, broker_latency=0.0, order_workers=0):
+    """
+    Drive the live fetch_stock_data -> trade_logic -> place_order path over
+    recorded bars against a MockBroker. `speed` is a multiple of real time;
+    0 replays as fast as possible. Returns a report dict.
+    """
+    downloader = ReplayDownloader(data, interval)
+    prices = data["Close"].to_numpy(dtype=float)
+    mock = MockBroker(cash=cash, latency=broker_latency, account_name=bot.ACCOUNT_NAME,
+                      price_source=lambda symbol: prices[downloader.visible - 1])
+    ws = BrokerClient(lambda: mock, ttl=0)
+    account_id = ws.get_account_id(bot.ACCOUNT_NAME)
+
+    # Fresh, isolated bot state so a replay never touches the live cache or positions
+    saved = bot.bar_store, bot.journal, bot.cycle_timer, bot.order_queue
+    bot.bar_store = BarStore(tempfile.mkdtemp(prefix="replay_bars_"))
+    bot.indicator_engines.clear()
+    bot.timeframes.clear()
+    bot.current_positions.clear()
+    bot.journal = TradeJournal(tempfile.mkdtemp(prefix="replay_journal_"), bot.JOURNAL_FORMAT)
+    bot.cycle_timer = timer = CycleTimer(history=len(data), observer=bot.cycle_timer.observer)
+    if order_workers:
+        bot.order_queue = OrderQueue(workers=order_workers, rate_per_second=1e9, burst=10**9,
+                                     on_result=bot.record_queued_order)
+
+    first_close = downloader.closes[0]
+    started = time.perf_counter()
+    try:
+        for count in range(1, len(data) + 1):
+            bar_close = downloader.closes[count - 1]
+            if speed:
+                wait = (bar_close - first_close).total_seconds() / speed - (time.perf_counter() - started)
+                if wait > 0:
+                    time.sleep(wait)
+            downloader.advance(count)
+            bot.replay_time = bar_close
+            timer.start()  # No wall-clock bar close in a replay, so no start lag or bar-to-order latency
+            bot.run_cycle(ws, account_id, [ticker], interval=interval, downloader=downloader)
+            timer.finish()
+        if bot.order_queue is not None:
+            bot.order_queue.close()
+    finally:
+        bot.replay_time = None
+        journal = bot.journal
+        journal.close()
+        bot.bar_store, bot.journal, bot.cycle_timer, bot.order_queue = saved
+    elapsed = time.perf_counter() - started
+
+    holdings_value = sum(quantity * prices[-1] for quantity in mock.holdings.values())
+    return {
+        "bars": len(data),
+        "elapsed": elapsed,
+        "decisions_per_second": len(data) / elapsed if elapsed else float("inf"),
+        "orders": len(mock.fills),
+        "final_equity": mock.cash + holdings_value,
+        "journal": journal.directory,
+        "stages": timer.summary(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded bars through the live trading path.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="OHLCV CSV with a datetime index (yfinance layout)")
+    source.add_argument("--cached", action="store_true", help="Replay the local bar cache for --symbol")
+    parser.add_argument("--symbol", default=bot.SECURITY)
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--speed", type=float, default=0.0, help="Multiple of real time; 0 = as fast as possible")
+    parser.add_argument("--limit", type=int, help="Only replay the first N bars")
+    parser.add_argument("--cash", type=float, default=10_000.0)
+    parser.add_argument("--broker-latency", type=float, default=0.0, help="Mock broker latency in seconds")
+    parser.add_argument("--order-workers", type=int, default=0, help="Use the async order queue with N workers")
+    parser.add_argument("--log-level", default="WARNING", help="Bot log level during the replay")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s - %(message)s")
+    data = load_bars(args.csv, args.symbol, args.interval)
+    if args.limit:
+        data = data.iloc[:args.limit]
+    if data.empty:
+        print("No bars to replay.")
+        return
+
+    report = replay(data, args.symbol, args.interval, args.speed, args.cash, args.broker_latency, args.order_workers)
+    print(f"Replayed {report['bars']} bars in {report['elapsed']:.2f} s "
+          f"({report['decisions_per_second']:.0f} decisions/s), {report['orders']} orders, "
+          f"final equity {report['final_equity']:.2f}; journal in {report['journal']}")
+    print(f"{'stage':>12} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for name, (p50, p95, worst) in sorted(report["stages"].items()):
+        print(f"{name:>12} {p50 * 1000:9.3f} {p95 * 1000:9.3f} {worst * 1000:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
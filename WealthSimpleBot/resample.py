@@ -0,0 +1,127 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from bar_store import to_timedelta
+from indicators import INDICATOR_COLUMNS
+
+RESAMPLED_COLUMNS = ["Open", "High", "Low", "Close", "Volume", "BarVWAP"]
+
+
+def _wall_nanoseconds(timestamp):
+    # Local wall-clock time, so day and hour buckets follow the exchange clock rather than UTC
+    offset = timestamp.utcoffset()
+    return timestamp.value if offset is None else timestamp.value + int(offset.total_seconds()) * 1_000_000_000
+
+
+class BarResampler:
+    """
+    Builds `interval` bars ("5m", "15m", "1h", "1d", ...) from consecutive
+    `base` bars, one base bar at a time in constant work. Buckets are
+    aligned to the local clock plus `offset`, so with offset="30min" hourly
+    bars start on the half hour like the US session.
+
+    BarVWAP is the bar's volume-weighted close, sum(close * volume) /
+    sum(volume), so it matches the session VWAP the bot computes on base
+    bars. A bar completes as soon as its last base bar arrives, or when
+    the first base bar of a later bucket does if there was a gap.
+
+    With an `engine`, indicators are updated on every completed bar. Its
+    session VWAP is fed the BarVWAP, so it equals the base-bar session VWAP
+    at the same close.
+    """
+
+    def __init__(self, interval, base="1m", history=500, offset="0min", engine=None):
+        self.interval = interval
+        self.span = to_timedelta(interval).value
+        self.base_span = to_timedelta(base).value
+        self.offset = pd.Timedelta(offset).value
+        self.engine = engine
+        self.tz = None
+        self.bar = None  # [bucket start (wall ns), open, high, low, close, volume, close * volume]
+        self.completed = deque(maxlen=history)
+        self.last_timestamp = None
+
+    def update(self, timestamp, open_, high, low, close, volume):
+        """
+        Add one base bar. Returns the list of bars it completed (usually
+        empty or one) as (label, values) pairs.
+        """
+        self.tz = timestamp.tz
+        self.last_timestamp = timestamp
+        wall = _wall_nanoseconds(timestamp)
+        start = wall - (wall - self.offset) % self.span
+        completed = []
+        if self.bar is not None and self.bar[0] != start:
+            completed.append(self._complete())
+        if self.bar is None:
+            self.bar = [start, open_, high, low, close, volume, close * volume]
+        else:
+            bar = self.bar
+            bar[2] = max(bar[2], high)
+            bar[3] = min(bar[3], low)
+            bar[4] = close
+            bar[5] += volume
+            bar[6] += close * volume
+        if wall + self.base_span >= start + self.span:
+            completed.append(self._complete())
+        return completed
+
+    def update_frame(self, data):
+        """
+        Feed the base bars of `data` newer than the last one seen. Returns the
+        number of bars completed.
+        """
+        index = data.index
+        begin = 0 if self.last_timestamp is None else index.searchsorted(self.last_timestamp, side="right")
+        if begin >= len(data):
+            return 0
+        values = data[["Open", "High", "Low", "Close", "Volume"]].to_numpy(dtype=float)[begin:]
+        count = 0
+        for timestamp, (open_, high, low, close, volume) in zip(index[begin:], values):
+            if np.isnan(close):
+                continue
+            count += len(self.update(timestamp, open_, high, low, close, 0.0 if np.isnan(volume) else volume))
+        return count
+
+    def _complete(self):
+        start, open_, high, low, close, volume, pv = self.bar
+        self.bar = None
+        label = pd.Timestamp(start)
+        if self.tz is not None:
+            label = label.tz_localize(self.tz, ambiguous=True, nonexistent="shift_forward")
+        bar_vwap = pv / volume if volume else close
+        row = [open_, high, low, close, volume, bar_vwap]
+        if self.engine is not None:
+            snapshot = self.engine.update(label, close, volume, vwap_price=bar_vwap)
+            row.extend(snapshot[column] for column in INDICATOR_COLUMNS)
+        self.completed.append((label, row))
+        return label, row
+
+    def frame(self):
+        """
+        Completed bars as a DataFrame, oldest first.
+        """
+        columns = RESAMPLED_COLUMNS + (INDICATOR_COLUMNS if self.engine is not None else [])
+        if not self.completed:
+            return pd.DataFrame(columns=columns)
+        labels, rows = zip(*self.completed)
+        return pd.DataFrame(list(rows), index=pd.DatetimeIndex(labels), columns=columns)
+
+
+def resample_bars(data, interval, offset="0min"):
+    """
+    Full pandas resample of base bars to `interval`, the reference for
+    BarResampler and a quick way to backtest on a higher timeframe.
+    """
+    close = data["Close"].astype(float)
+    volume = data["Volume"].astype(float).fillna(0.0)
+    frame = pd.DataFrame({"Open": data["Open"], "High": data["High"], "Low": data["Low"], "Close": close,
+                          "Volume": volume, "PV": close * volume})
+    resampled = frame.resample(to_timedelta(interval), offset=pd.Timedelta(offset), origin="start_day").agg(
+        {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum", "PV": "sum"}
+    ).dropna(subset=["Close"])
+    resampled["BarVWAP"] = (resampled.pop("PV") / resampled["Volume"]).where(resampled["Volume"] > 0,
+                                                                              resampled["Close"])
+    return resampled[RESAMPLED_COLUMNS]
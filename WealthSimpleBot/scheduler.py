@@ -0,0 +1,132 @@
+import logging
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class BarScheduler:
+    """
+    Fires `offset` seconds after every `interval`-second bar boundary (wall
+    clock), instead of sleeping a fixed time after the work is done.
+
+    If a cycle overruns and boundaries were missed, `late_policy` decides:
+      - "coalesce": run once straight away for the most recent boundary
+      - "skip":     drop the missed boundaries and wait for the next one
+    Missed boundaries are never queued up and replayed.
+    """
+
+    def __init__(self, interval=60, offset=2.0, late_policy="coalesce", clock=time.time, sleep=time.sleep):
+        if late_policy not in ("coalesce", "skip"):
+            raise ValueError(f"Unknown late_policy '{late_policy}'.")
+        self.interval = interval
+        self.offset = offset
+        self.late_policy = late_policy
+        self.clock = clock
+        self.sleep = sleep
+        self.next_fire = None
+        self.missed = 0
+
+    def _first_fire_after(self, now):
+        return (math.floor((now - self.offset) / self.interval) + 1) * self.interval + self.offset
+
+    def wait(self):
+        """
+        Block until the next fire time and return the bar boundary it belongs to.
+        """
+        now = self.clock()
+        if self.next_fire is None:
+            self.next_fire = self._first_fire_after(now)
+        elif now >= self.next_fire + self.interval:
+            behind = math.floor((now - self.next_fire) / self.interval)
+            if self.late_policy == "coalesce":
+                self.missed += behind
+                self.next_fire += behind * self.interval
+            else:
+                self.missed += behind + 1
+                self.next_fire = self._first_fire_after(now)
+            logging.warning(f"Scheduler fell behind; {self.missed} bar(s) missed so far ({self.late_policy}).")
+
+        if self.next_fire > now:
+            self.sleep(self.next_fire - now)
+        fired = self.next_fire
+        self.next_fire += self.interval
+        return fired - self.offset
+
+
+class CycleTimer:
+    """
+    Per-cycle stage timings. Stages nest, and a stage's time excludes the
+    stages run inside it, so "decision" does not double count "order".
+    Repeated stages in one cycle (one per symbol) are summed.
+    `observer(stage, seconds)`, if given, is called for every stage run.
+    """
+
+    def __init__(self, history=1000, observer=None):
+        self.history = deque(maxlen=history)
+        self.observer = observer
+        self.current = None
+        self.cycles = 0
+        self._cycle_start = None
+        self._stack = []
+
+    def start(self, bar_close=None):
+        self.current = {"bar_close": bar_close, "started": time.time()}
+        self._cycle_start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        if self.current is None:
+            yield
+            return
+        frame = [time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[0]
+            self.current[name] = self.current.get(name, 0.0) + elapsed - frame[1]
+            if self._stack:
+                self._stack[-1][1] += elapsed
+            if self.observer is not None:
+                self.observer(name, elapsed - frame[1])
+
+    def mark_order(self):
+        # Wall-clock latency from the bar close to the latest order submission of this cycle
+        if self.current is not None and self.current["bar_close"] is not None:
+            self.current["bar_to_order"] = time.time() - self.current["bar_close"]
+
+    def finish(self):
+        if self.current is None:
+            return None
+        cycle = self.current
+        cycle["total"] = time.perf_counter() - self._cycle_start
+        if self.observer is not None:
+            self.observer("total", cycle["total"])
+        if cycle["bar_close"] is not None:
+            cycle["start_lag"] = cycle["started"] - cycle["bar_close"]
+        self.history.append(cycle)
+        self.cycles += 1
+        self.current = None
+        return cycle
+
+    def summary(self):
+        """
+        {stage: (p50, p95, max)} in seconds over the recorded cycles.
+        """
+        stages = {}
+        for cycle in self.history:
+            for name, value in cycle.items():
+                if name not in ("bar_close", "started") and value is not None:
+                    stages.setdefault(name, []).append(value)
+        return {
+            name: (float(np.percentile(values, 50)), float(np.percentile(values, 95)), max(values))
+            for name, values in stages.items()
+        }
+
+    def log_summary(self):
+        for name, (p50, p95, worst) in sorted(self.summary().items()):
+            logging.info(f"Timing {name}: p50 {p50 * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms, max {worst * 1000:.1f} ms")
@@ -0,0 +1,60 @@
+import json
+import logging
+import os
+import time
+
+from indicators import IndicatorEngine
+
+SNAPSHOT_VERSION = 1
+
+
+def save_snapshot(path, positions, engines):
+    """
+    Write positions and indicator engine state to `path`. The snapshot is
+    written to a temporary file and renamed over the old one, so a crash
+    mid-write leaves the previous snapshot intact.
+    """
+    state = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "positions": {ticker: position for ticker, position in positions.items() if position},
+        "engines": {ticker: engine.to_state() for ticker, engine in engines.items()},
+    }
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(state, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def load_snapshot(path, short_window, long_window, rsi_period):
+    """
+    Read a snapshot back as (positions, engines). Engines built with other
+    window settings are left out so they are rebuilt from the bar cache.
+    Returns empty dicts if there is no usable snapshot.
+    """
+    if not os.path.exists(path):
+        return {}, {}
+    try:
+        with open(path) as f:
+            state = json.load(f)
+        if state.get("version") != SNAPSHOT_VERSION:
+            logging.warning(f"Ignoring snapshot {path} with version {state.get('version')}.")
+            return {}, {}
+        engines = {}
+        for ticker, engine_state in state["engines"].items():
+            engine = IndicatorEngine.from_state(engine_state)
+            if engine.matches(short_window, long_window, rsi_period):
+                engines[ticker] = engine
+            else:
+                logging.info(f"Indicator settings changed; rebuilding {ticker} indicators from the bar cache.")
+        age = time.time() - state["saved_at"]
+        logging.info(f"Resumed from snapshot {path} saved {age:.0f}s ago: positions {state['positions']}.")
+        return dict(state["positions"]), engines
+    except Exception as e:
+        logging.error(f"Error loading snapshot {path}: {e}")
+        return {}, {}
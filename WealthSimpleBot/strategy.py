@@ -0,0 +1,23 @@
+import os
+
+try:
+    from dotenv import load_dotenv
+except ImportError:  # Plain environment variables still work without python-dotenv
+    pass
+else:
+    load_dotenv()
+
+# --- STRATEGY CONFIGURATION ---
+# Shared by the live bot, backtest.py and sweep.py; importing this module only reads settings
+TRADE_AMOUNT = float(os.getenv("TRADE_AMOUNT", 100))
+SHORT_WINDOW = int(os.getenv("SHORT_WINDOW", 10))
+LONG_WINDOW = int(os.getenv("LONG_WINDOW", 30))
+RSI_OVERBOUGHT = int(os.getenv("RSI_OVERBOUGHT", 70))
+RSI_OVERSOLD = int(os.getenv("RSI_OVERSOLD", 30))
+RSI_PERIOD = int(os.getenv("RSI_PERIOD", 14))
+BAR_CACHE_DIR = os.getenv("BAR_CACHE_DIR", "bar_cache")
+
+
+def calculate_trade_size(available_balance, default_size):
+    risk_factor = 0.05  # Risk 5% of available balance
+    return min(default_size, available_balance * risk_factor)
@@ -0,0 +1,401 @@
+import io
+import logging
+import socket
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BAR_DTYPE, BAR_FIELDS, to_timedelta
+
+# One parsed trade or quote. `symbol` is the position of the ticker in the source's symbol list.
+TICK_DTYPE = np.dtype([
+    ("symbol", "<i4"),
+    ("timestamp", "<i8"),  # UTC nanoseconds
+    ("price", "<f8"),
+    ("size", "<f8"),
+])
+
+
+class TickRing:
+    """
+    Fixed-capacity tick buffer between one producer thread and one consumer.
+    `push` copies a whole batch in with at most two slice assignments and
+    `drain` hands back everything written since the last drain. When the
+    consumer falls a full ring behind, the oldest unread ticks are dropped
+    and counted rather than growing memory.
+    """
+
+    def __init__(self, capacity=1 << 20):
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=TICK_DTYPE)
+        self.written = 0
+        self.read = 0
+        self.dropped = 0
+        self.ready = threading.Condition()
+
+    def push(self, ticks):
+        count = len(ticks)
+        if count == 0:
+            return
+        with self.ready:
+            if count > self.capacity:
+                self.dropped += count - self.capacity
+                ticks, count = ticks[-self.capacity:], self.capacity
+            overflow = self.written + count - self.read - self.capacity
+            if overflow > 0:
+                self.dropped += overflow
+                self.read += overflow
+            start = self.written % self.capacity
+            first = min(count, self.capacity - start)
+            self.buffer[start:start + first] = ticks[:first]
+            self.buffer[:count - first] = ticks[first:]
+            self.written += count
+            self.ready.notify()
+
+    def drain(self, timeout=None):
+        """
+        Return the unread ticks (possibly none) as a new array, waiting up to
+        `timeout` seconds for some to arrive.
+        """
+        with self.ready:
+            if self.written == self.read and timeout != 0:
+                self.ready.wait(timeout)
+            count = self.written - self.read
+            start = self.read % self.capacity
+            if start + count <= self.capacity:
+                ticks = self.buffer[start:start + count].copy()
+            else:
+                ticks = np.concatenate((self.buffer[start:], self.buffer[:start + count - self.capacity]))
+            self.read = self.written
+        return ticks
+
+    def wake(self):
+        with self.ready:
+            self.ready.notify_all()
+
+
+class TickSource:
+    """
+    Base class for line-oriented tick feeds. Each line is
+    `SYMBOL,epoch_seconds,price,size` (size 0 for a quote mid-price).
+    Subclasses implement `read()`, which returns the next chunk of bytes,
+    b"" when nothing has arrived yet, or None once the feed has ended.
+    Lines for symbols not in `symbols` are ignored.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = pd.Index([symbol.upper() for symbol in symbols])
+        self._partial = b""
+
+    def read(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def parse(self, chunk):
+        """
+        Parse the complete lines of `chunk` into a TICK_DTYPE array. A trailing
+        partial line is kept until the next chunk completes it.
+        """
+        chunk = self._partial + chunk
+        end = chunk.rfind(b"\n") + 1
+        self._partial = chunk[end:]
+        if end == 0:
+            return np.empty(0, dtype=TICK_DTYPE)
+        try:
+            frame = pd.read_csv(io.BytesIO(chunk[:end]), header=None, names=["symbol", "time", "price", "size"],
+                                dtype={"symbol": str, "time": float, "price": float, "size": float},
+                                skip_blank_lines=True)
+        except Exception as e:
+            logging.error(f"Error parsing tick data: {e}")
+            return np.empty(0, dtype=TICK_DTYPE)
+        codes = self.symbols.get_indexer(frame["symbol"].str.upper())
+        known = codes >= 0
+        ticks = np.empty(int(known.sum()), dtype=TICK_DTYPE)
+        ticks["symbol"] = codes[known]
+        ticks["timestamp"] = np.round(frame["time"].to_numpy()[known] * 1e9)
+        ticks["price"] = frame["price"].to_numpy()[known]
+        ticks["size"] = np.nan_to_num(frame["size"].to_numpy()[known])
+        return ticks
+
+    def pump(self, ring, stop):
+        """
+        Read and parse until the feed ends or `stop` is set, pushing every
+        batch into `ring`.
+        """
+        try:
+            while not stop.is_set():
+                chunk = self.read()
+                if chunk is None:
+                    break
+                if chunk:
+                    ring.push(self.parse(chunk))
+            if self._partial.strip():
+                ring.push(self.parse(b"\n"))
+        except Exception as e:
+            logging.error(f"Tick source failed: {e}")
+        finally:
+            self.close()
+
+
+class FileTickSource(TickSource):
+    """
+    Tails a local tick file, the stand-in for a live feed. With `follow`
+    the file is polled for new lines like `tail -f`; without it the feed
+    ends at end of file.
+    """
+
+    def __init__(self, path, symbols, follow=True, from_end=False, poll_interval=0.05, chunk_size=1 << 16):
+        super().__init__(symbols)
+        self.path = path
+        self.follow = follow
+        self.poll_interval = poll_interval
+        self.chunk_size = chunk_size
+        self.file = open(path, "rb")
+        if from_end:
+            self.file.seek(0, io.SEEK_END)
+
+    def read(self):
+        chunk = self.file.read(self.chunk_size)
+        if chunk:
+            return chunk
+        if not self.follow:
+            return None
+        time.sleep(self.poll_interval)
+        return b""
+
+    def close(self):
+        self.file.close()
+
+
+class SocketTickSource(TickSource):
+    """
+    Reads newline-delimited ticks from a TCP feed. The feed ends when the
+    server closes the connection.
+    """
+
+    def __init__(self, host, port, symbols, timeout=1.0, chunk_size=1 << 16):
+        super().__init__(symbols)
+        self.chunk_size = chunk_size
+        self.socket = socket.create_connection((host, port), timeout=timeout)
+        logging.info(f"Connected to tick feed {host}:{port}.")
+
+    def read(self):
+        try:
+            chunk = self.socket.recv(self.chunk_size)
+        except socket.timeout:
+            return b""
+        return chunk or None
+
+    def close(self):
+        self.socket.close()
+
+
+def open_tick_source(url, symbols):
+    """
+    Build a TickSource from `tcp://host:port`, `file:///path/to/ticks.csv`
+    (followed like tail -f) or `file+once:///path` (read once to the end).
+    """
+    scheme, _, location = url.partition("://")
+    if scheme == "tcp":
+        host, _, port = location.rpartition(":")
+        return SocketTickSource(host, int(port), symbols)
+    if scheme in ("file", "file+once"):
+        return FileTickSource(location, symbols, follow=scheme == "file")
+    raise ValueError(f"Unsupported tick source '{url}'.")
+
+
+class BarAggregator:
+    """
+    Folds time-ordered ticks for one symbol into OHLCV bars of `interval`,
+    a whole batch at a time with reduceat over the bar boundaries. The
+    forming bar is carried between batches; it is returned once a tick for
+    a later bar arrives or `close_through` passes its end. Ticks for a bar
+    that has already been returned, or that started before the forming
+    bar, are counted in `late` and dropped.
+    """
+
+    def __init__(self, interval="1m"):
+        self.interval = to_timedelta(interval).value
+        self.bar = None  # The forming bar as a one-record BAR_DTYPE array
+        self.closed_until = None  # End of the last bar returned, UTC nanoseconds
+        self.late = 0
+
+    def update(self, timestamps, prices, sizes):
+        """
+        Add a batch of ticks and return the bars it completed as a BAR_DTYPE array.
+        """
+        # Once a bar is forming, every earlier bar is over, whether or not it was returned
+        floor = self.closed_until if self.bar is None else int(self.bar["timestamp"][0])
+        if floor is not None:
+            fresh = timestamps >= floor
+            if not fresh.all():
+                self.late += int(len(fresh) - fresh.sum())
+                timestamps, prices, sizes = timestamps[fresh], prices[fresh], sizes[fresh]
+        if len(timestamps) == 0:
+            return np.empty(0, dtype=BAR_DTYPE)
+        if (np.diff(timestamps) < 0).any():
+            order = np.argsort(timestamps, kind="stable")
+            timestamps, prices, sizes = timestamps[order], prices[order], sizes[order]
+
+        starts = timestamps - timestamps % self.interval
+        firsts = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+        lasts = np.r_[firsts[1:] - 1, len(timestamps) - 1]
+        bars = np.empty(len(firsts), dtype=BAR_DTYPE)
+        bars["timestamp"] = starts[firsts]
+        bars["Open"] = prices[firsts]
+        bars["High"] = np.maximum.reduceat(prices, firsts)
+        bars["Low"] = np.minimum.reduceat(prices, firsts)
+        bars["Close"] = prices[lasts]
+        bars["Volume"] = np.add.reduceat(sizes, firsts)
+
+        if self.bar is not None:
+            if self.bar["timestamp"][0] == bars["timestamp"][0]:
+                first = bars[0]
+                first["Open"] = self.bar["Open"][0]
+                first["High"] = max(first["High"], self.bar["High"][0])
+                first["Low"] = min(first["Low"], self.bar["Low"][0])
+                first["Volume"] += self.bar["Volume"][0]
+            else:
+                bars = np.concatenate((self.bar, bars))
+        self.bar = bars[-1:].copy()
+        completed = bars[:-1]
+        if len(completed):
+            self.closed_until = int(completed["timestamp"][-1]) + self.interval
+        return completed
+
+    def close_through(self, now):
+        """
+        Return the forming bar if it has ended by `now` (UTC nanoseconds).
+        """
+        if self.bar is None or self.bar["timestamp"][0] + self.interval > now:
+            return np.empty(0, dtype=BAR_DTYPE)
+        completed, self.bar = self.bar, None
+        self.closed_until = int(completed["timestamp"][0]) + self.interval
+        return completed
+
+    def pending_end(self):
+        return None if self.bar is None else int(self.bar["timestamp"][0]) + self.interval
+
+
+class TickStream:
+    """
+    Streaming replacement for polling: a reader thread pumps `source` into a
+    TickRing, and `run` aggregates the ticks into bars per symbol and calls
+    `on_bar(ticker, bars)` with an OHLCV DataFrame as soon as bars complete.
+
+    A bar completes when a tick for a later bar arrives or, when `clock` is
+    given, `grace` seconds after its end on that clock, so quiet symbols
+    still get their bar. Pass clock=None for recorded ticks, where only the
+    ticks themselves move time forward; any forming bars are closed when
+    such a feed ends.
+
+    `on_boundary(end)` is called once every symbol's bars up to `end` (UTC
+    nanoseconds) have been handed to `on_bar`: each time the clock passes a
+    bar end plus `grace`, and once when a recorded feed ends.
+    """
+
+    def __init__(self, source, interval="1m", on_bar=None, tz="America/New_York", capacity=1 << 20,
+                 grace=2.0, clock=time.time, on_boundary=None):
+        self.source = source
+        self.interval = interval
+        self.on_bar = on_bar
+        self.on_boundary = on_boundary
+        self.boundary = None  # Last bar end passed to on_boundary
+        self.tz = tz
+        self.grace = int(grace * 1e9)
+        self.clock = clock
+        self.ring = TickRing(capacity)
+        self.aggregators = [BarAggregator(interval) for _ in source.symbols]
+        self.stop_event = threading.Event()
+        self.reader = None
+        self.stats = {"ticks": 0, "bars": 0}
+
+    def start(self):
+        self.reader = threading.Thread(target=self._pump, name="tick-reader", daemon=True)
+        self.reader.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.ring.wake()
+
+    def run(self):
+        """
+        Process ticks until the source ends or `stop` is called.
+        """
+        if self.reader is None:
+            self.start()
+        while True:
+            finished = not self.reader.is_alive()
+            ticks = self.ring.drain(timeout=0 if finished else self._wait())
+            if len(ticks):
+                self.process(ticks)
+            if self.clock is not None:
+                now = int(self.clock() * 1e9) - self.grace
+                self.close_through(now)
+                self._boundary(now)
+            if self.stop_event.is_set() or (finished and self.ring.written == self.ring.read):
+                break
+        if self.clock is None and not self.stop_event.is_set():
+            self.close_through(np.iinfo(np.int64).max)
+            self._boundary(max((aggregator.closed_until or 0) for aggregator in self.aggregators))
+        self.stats["dropped"] = self.ring.dropped
+        self.stats["late"] = sum(aggregator.late for aggregator in self.aggregators)
+
+    def process(self, ticks):
+        self.stats["ticks"] += len(ticks)
+        codes = ticks["symbol"]
+        single = codes[0] if (codes == codes[0]).all() else None
+        for code in ([single] if single is not None else np.unique(codes)):
+            batch = ticks if single is not None else ticks[codes == code]
+            bars = self.aggregators[code].update(batch["timestamp"], batch["price"], batch["size"])
+            self._emit(code, bars)
+
+    def close_through(self, now):
+        for code, aggregator in enumerate(self.aggregators):
+            self._emit(code, aggregator.close_through(now))
+
+    def _boundary(self, now):
+        end = now - now % self.aggregators[0].interval if self.aggregators else now
+        if self.boundary is not None and end <= self.boundary:
+            return
+        self.boundary = end
+        if self.on_boundary is None:
+            return
+        try:
+            self.on_boundary(end)
+        except Exception as e:
+            logging.error(f"Error handling the bar boundary: {e}")
+
+    def _wait(self):
+        # Sleep until the earliest forming bar is due to be closed by the clock
+        if self.clock is None:
+            return 0.5
+        ends = [end for end in (aggregator.pending_end() for aggregator in self.aggregators) if end is not None]
+        if not ends:
+            return 0.5
+        return min(0.5, max(0.0, (min(ends) + self.grace) / 1e9 - self.clock()))
+
+    def _emit(self, code, bars):
+        if len(bars) == 0:
+            return
+        self.stats["bars"] += len(bars)
+        if self.on_bar is None:
+            return
+        index = pd.DatetimeIndex(bars["timestamp"].astype("datetime64[ns]")).tz_localize("UTC")
+        if self.tz is not None:
+            index = index.tz_convert(self.tz)
+        frame = pd.DataFrame({field: bars[field] for field in BAR_FIELDS}, index=index)
+        try:
+            self.on_bar(self.source.symbols[code], frame)
+        except Exception as e:
+            logging.error(f"Error handling streamed bars for {self.source.symbols[code]}: {e}")
+
+    def _pump(self):
+        try:
+            self.source.pump(self.ring, self.stop_event)
+        finally:
+            self.ring.wake()
@@ -0,0 +1,157 @@
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from backtest import load_bars, signal_masks, simulate, trade_stats
+from indicators import compute_indicators
+from strategy import RSI_PERIOD, TRADE_AMOUNT
+
+RESULT_COLUMNS = ["trades", "win_rate", "avg_trade_return", "exposure", "total_return", "max_drawdown"]
+
+# Worker-side views onto the shared price/indicator arrays
+_shared = {}
+_sma_cache = {}
+
+
+def parse_values(spec, cast=int):
+    """
+    "10,20,30" -> [10, 20, 30] and "5:30:5" -> [5, 10, 15, 20, 25, 30] (inclusive stop).
+    """
+    if ":" in spec:
+        start, stop, step = (cast(part) for part in spec.split(":"))
+        return [cast(v) for v in np.arange(start, stop + step / 2, step)]
+    return [cast(part) for part in spec.split(",") if part]
+
+
+def rolling_mean(values, window):
+    # Same NaN handling as compute_indicators: a NaN close only blanks the windows that contain it
+    return pd.Series(values).rolling(window).mean().to_numpy()
+
+
+def share_arrays(arrays):
+    """
+    Copy each array into a new shared memory block.
+    Returns (blocks, specs) where specs is what workers need to attach.
+    """
+    blocks, specs = [], {}
+    for name, array in arrays.items():
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+        blocks.append(block)
+        specs[name] = (block.name, array.shape, array.dtype.str)
+    return blocks, specs
+
+
+def attach_arrays(specs):
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _shared[name] = (block, np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf))
+
+
+def evaluate_windows(short_window, long_window, thresholds, initial_cash, trade_amount, slippage_bps):
+    """
+    Run every (overbought, oversold) pair for one SMA window pair.
+    The SMAs are cached per worker, so each window is only computed once.
+    """
+    price = _shared["price"][1]
+    vwap = _shared["vwap"][1]
+    rsi = _shared["rsi"][1]
+    for window in (short_window, long_window):
+        if window not in _sma_cache:
+            _sma_cache[window] = rolling_mean(price, window)
+
+    rows = []
+    for rsi_overbought, rsi_oversold in thresholds:
+        buy, sell = signal_masks(
+            price, vwap, _sma_cache[short_window], _sma_cache[long_window], rsi, rsi_overbought, rsi_oversold
+        )
+        stats = trade_stats(*simulate(price, buy, sell, initial_cash, trade_amount, slippage_bps), initial_cash)
+        rows.append((short_window, long_window, rsi_overbought, rsi_oversold,
+                     *(stats[column] for column in RESULT_COLUMNS)))
+    return rows
+
+
+def run_sweep(data, short_windows, long_windows, overbought_levels, oversold_levels, rsi_period=RSI_PERIOD,
+              initial_cash=10_000.0, trade_amount=TRADE_AMOUNT, slippage_bps=0.0, workers=None,
+              rank_by="total_return"):
+    """
+    Backtest every valid parameter combination on a process pool and return a
+    ranked DataFrame. Prices and the parameter-independent indicators (VWAP and
+    RSI) are placed in shared memory once instead of being pickled per task.
+    """
+    # Only VWAP and RSI are shared; the swept SMA windows are computed in the workers
+    indicators = compute_indicators(data, 1, 1, rsi_period)
+    arrays = {
+        "price": data["Close"].to_numpy(dtype=float),
+        "vwap": indicators["VWAP"].to_numpy(dtype=float),
+        "rsi": indicators["RSI"].to_numpy(dtype=float),
+    }
+    thresholds = [(high, low) for high, low in itertools.product(overbought_levels, oversold_levels) if low <= high]
+    window_pairs = [(s, l) for s, l in itertools.product(short_windows, long_windows) if s < l]
+
+    rows = []
+    blocks, specs = share_arrays(arrays)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=attach_arrays, initargs=(specs,)) as pool:
+            futures = [
+                pool.submit(evaluate_windows, s, l, thresholds, initial_cash, trade_amount, slippage_bps)
+                for s, l in window_pairs
+            ]
+            for future in as_completed(futures):
+                rows.extend(future.result())
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    results = pd.DataFrame(rows, columns=["short_window", "long_window", "rsi_overbought", "rsi_oversold",
+                                          *RESULT_COLUMNS])
+    return results.sort_values(rank_by, ascending=False, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep SMA windows and RSI thresholds over historical bars.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="OHLCV CSV with a datetime index (yfinance layout)")
+    source.add_argument("--symbol", help="Read bars for this ticker from the local bar cache")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--short", default="5:30:5", help="SHORT_WINDOW values, 'a,b,c' or 'start:stop:step'")
+    parser.add_argument("--long", default="20:120:10", help="LONG_WINDOW values")
+    parser.add_argument("--overbought", default="60:80:5", help="RSI_OVERBOUGHT values")
+    parser.add_argument("--oversold", default="20:40:5", help="RSI_OVERSOLD values")
+    parser.add_argument("--rsi-period", type=int, default=RSI_PERIOD)
+    parser.add_argument("--initial-cash", type=float, default=10_000.0)
+    parser.add_argument("--trade-amount", type=float, default=TRADE_AMOUNT)
+    parser.add_argument("--slippage-bps", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--rank-by", default="total_return", choices=RESULT_COLUMNS)
+    parser.add_argument("--out", default="sweep_results.csv", help="Result table (.csv or .parquet)")
+    parser.add_argument("--top", type=int, default=10, help="Rows to print")
+    args = parser.parse_args()
+
+    data = load_bars(args.csv, args.symbol, args.interval)
+    started = time.perf_counter()
+    results = run_sweep(
+        data, parse_values(args.short), parse_values(args.long), parse_values(args.overbought, float),
+        parse_values(args.oversold, float), args.rsi_period, args.initial_cash, args.trade_amount,
+        args.slippage_bps, args.workers, args.rank_by,
+    )
+    elapsed = time.perf_counter() - started
+
+    if args.out.endswith(".parquet"):
+        results.to_parquet(args.out, index=False)
+    else:
+        results.to_csv(args.out, index=False, float_format="%.6g")
+    print(f"Evaluated {len(results)} combinations on {len(data)} bars in {elapsed:.1f} s "
+          f"with {args.workers} workers -> {args.out}")
+    print(results.head(args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,30 @@
 import os
+import atexit
 import logging
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
 import pandas as pd
+import pyotp
 from dotenv import load_dotenv
 from wealthsimple import Wealthsimple
 import yfinance as yf
-import time
+
+from bar_store import BarStore, to_timedelta
+from broker import BrokerClient, MockBroker
+from indicators import IndicatorEngine
+from journal import TradeJournal
+from metrics import REGISTRY, ErrorCounter, start_http_server
+from order_queue import OrderQueue
+from resample import BarResampler
+from portfolio import batch_download, split_by_ticker
+from scheduler import BarScheduler, CycleTimer
+from snapshot import load_snapshot, save_snapshot
+from strategy import (
+    BAR_CACHE_DIR, LONG_WINDOW, RSI_OVERBOUGHT, RSI_OVERSOLD, RSI_PERIOD, SHORT_WINDOW, TRADE_AMOUNT,
+    calculate_trade_size,
+)
+from streaming import TickStream, open_tick_source
 
 # Load environment variables
 load_dotenv()
@@ -15,27 +35,92 @@ PASSWORD = os.getenv("PASSWORD")
 AUTH_SECRET_KEY = os.getenv("AUTH_SECRET_KEY")
 ACCOUNT_NAME = os.getenv("ACCOUNT_NAME", "Personal Account")
 SECURITY = os.getenv("SECURITY", "AAPL")
-TRADE_AMOUNT = float(os.getenv("TRADE_AMOUNT", 100))
-SHORT_WINDOW = int(os.getenv("SHORT_WINDOW", 10))
-LONG_WINDOW = int(os.getenv("LONG_WINDOW", 30))
-RSI_OVERBOUGHT = int(os.getenv("RSI_OVERBOUGHT", 70))
-RSI_OVERSOLD = int(os.getenv("RSI_OVERSOLD", 30))
-
-# --- SETUP LOGGING ---
-logging.basicConfig(
-    filename="trading_bot.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
+SECURITIES = [s.strip().upper() for s in os.getenv("SECURITIES", SECURITY).split(",") if s.strip()]
+PORTFOLIO_BATCH_SIZE = int(os.getenv("PORTFOLIO_BATCH_SIZE", 100))
+PORTFOLIO_WORKERS = int(os.getenv("PORTFOLIO_WORKERS", 8))
+BAR_OFFSET_SECONDS = float(os.getenv("BAR_OFFSET_SECONDS", 2))
+LATE_TICK_POLICY = os.getenv("LATE_TICK_POLICY", "coalesce")
+TIMING_LOG_EVERY = int(os.getenv("TIMING_LOG_EVERY", 30))
+BROKER = os.getenv("BROKER", "wealthsimple")  # 'wealthsimple' or 'mock'
+BROKER_CACHE_TTL = float(os.getenv("BROKER_CACHE_TTL", 5))
+ORDER_WORKERS = int(os.getenv("ORDER_WORKERS", 4))  # 0 places orders synchronously
+ORDER_RATE_LIMIT = float(os.getenv("ORDER_RATE_LIMIT", 5))  # Orders per second per account
+ORDER_MAX_RETRIES = int(os.getenv("ORDER_MAX_RETRIES", 3))  # Only for orders that never reached the broker
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9108))  # 0 disables the metrics endpoint
+JOURNAL_DIR = os.getenv("JOURNAL_DIR", "journal")
+JOURNAL_FORMAT = os.getenv("JOURNAL_FORMAT", "arrow")  # 'arrow', 'parquet' or 'csv'
+TIMEFRAMES = [s.strip() for s in os.getenv("TIMEFRAMES", "").split(",") if s.strip()]  # e.g. 5m,15m,1h
+TIMEFRAME_OFFSET = os.getenv("TIMEFRAME_OFFSET", "30min")  # Bucket alignment; 30min starts hourly bars at 9:30
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "bot_state.json")  # Empty disables checkpoints
+STREAM_SOURCE = os.getenv("STREAM_SOURCE")  # e.g. tcp://host:port or file:///path/ticks.csv; unset polls bars
+STREAM_TIMEZONE = os.getenv("STREAM_TIMEZONE", "America/New_York")
+
+# --- METRICS ---
+DOWNLOADS = REGISTRY.counter("bot_downloads_total", "Bar download requests.", ["mode"])
+DOWNLOAD_SECONDS = REGISTRY.histogram("bot_download_seconds", "Bar download latency in seconds.", ["mode"])
+STAGE_SECONDS = REGISTRY.histogram("bot_stage_seconds", "Time spent per cycle stage in seconds.", ["stage"])
+TRADE_LOGIC_EVALUATIONS = REGISTRY.counter(
+    "bot_trade_logic_evaluations_total", "trade_logic evaluations by resulting signal.", ["signal"]
 )
+ORDERS = REGISTRY.counter("bot_orders_total", "Orders by side and outcome.", ["side", "status"])
+ERRORS = REGISTRY.counter("bot_errors_total", "Error log records by function.", ["function", "level"])
+logging.getLogger().addHandler(ErrorCounter(ERRORS))
 
 # --- GLOBAL VARIABLES ---
-current_position = None  # Tracks the current position ('long', None)
+current_positions = {}  # Tracks the current position per ticker ('long', None)
+indicator_engines = {}  # One IndicatorEngine per ticker
+timeframes = {}  # (ticker, interval) -> BarResampler fed from the 1-minute bars
+bar_store = BarStore(BAR_CACHE_DIR)
+cycle_timer = CycleTimer(observer=lambda stage, seconds: STAGE_SECONDS.observe(seconds, stage=stage))
+order_queue = None  # OrderQueue when orders are placed asynchronously
+replay_time = None  # Simulated market clock (pd.Timestamp) while replaying recorded bars
+journal = TradeJournal(JOURNAL_DIR, JOURNAL_FORMAT)  # Decisions and orders as columnar segments
+atexit.register(lambda: journal.close())
 
 # --- FUNCTIONS ---
 
-def calculate_trade_size(available_balance, default_size):
-    risk_factor = 0.05  # Risk 5% of available balance
-    return min(default_size, available_balance * risk_factor)
+def setup_logging(path="trading_bot.log"):
+    # The loop only enqueues records; a listener thread does the file writes.
+    # Called from main() so importing this module (replay.py) creates no log file or thread.
+    log_file_handler = logging.FileHandler(path)
+    log_file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    log_queue = queue.SimpleQueue()
+    log_queue_handler = QueueHandler(log_queue)
+    log_queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    logging.basicConfig(level=logging.INFO, handlers=[log_queue_handler])
+    log_listener = QueueListener(log_queue, log_file_handler)
+    log_listener.start()
+    atexit.register(log_listener.stop)
+
+def market_now(tz=None):
+    if replay_time is not None:
+        return replay_time.tz_convert(tz) if tz is not None and replay_time.tz is not None else replay_time
+    return pd.Timestamp.now(tz=tz)
+
+def get_indicator_engine(ticker):
+    if ticker not in indicator_engines:
+        indicator_engines[ticker] = IndicatorEngine(SHORT_WINDOW, LONG_WINDOW, RSI_PERIOD)
+    return indicator_engines[ticker]
+
+def get_timeframe(ticker, interval, history=500):
+    """
+    Completed `interval` bars for `ticker` with SMA/RSI/VWAP columns, derived
+    from the cached 1-minute bars without any download.
+    """
+    key = (ticker, interval)
+    if key not in timeframes:
+        resampler = BarResampler(interval, base="1m", history=history, offset=TIMEFRAME_OFFSET,
+                                 engine=IndicatorEngine(SHORT_WINDOW, LONG_WINDOW, RSI_PERIOD))
+        last = bar_store.last_timestamp(ticker, "1m")
+        if last is not None:
+            resampler.update_frame(bar_store.read(ticker, "1m", since=last - history * to_timedelta(interval)))
+        timeframes[key] = resampler
+    return timeframes[key].frame()
+
+def update_timeframes(ticker, data):
+    for (symbol, _), resampler in timeframes.items():
+        if symbol == ticker:
+            resampler.update_frame(data)
 
 def get_account_balance(ws, account_id):
     try:
@@ -49,7 +134,15 @@ def get_account_balance(ws, account_id):
         logging.error(f"Error retrieving account balance: {e}")
         return 0
 
+def get_available_cash(ws, account_id):
+    # Queued buys have not reached the broker yet, so the balance does not reflect them
+    balance = get_account_balance(ws, account_id)
+    if order_queue is not None:
+        balance -= order_queue.pending(account_id, order_type="buy")
+    return max(balance, 0)
+
 def get_position_size(ws, account_id, ticker):
+    # None when the positions could not be read, so an error is never taken for a flat position
     try:
         positions = ws.get_positions(account_id)
         for position in positions:
@@ -59,27 +152,48 @@ def get_position_size(ws, account_id, ticker):
         return 0
     except Exception as e:
         logging.error(f"Error retrieving position size: {e}")
-        return 0
-
-def calculate_vwap(data):
-    if "VWAP" not in data.columns:
-        data["VWAP"] = (data["Close"] * data["Volume"]).cumsum() / data["Volume"].cumsum()
-    return data
+        return None
 
 def place_order(ws, account_id, ticker, size, order_type):
+    """
+    Place the order now, or hand it to the order queue. Returns True only
+    when it was placed here; queued orders report back through
+    record_queued_order.
+    """
+    if order_queue is not None:
+        order_queue.submit(ws, account_id, ticker, size, order_type)
+        journal.record_order(ticker=ticker, side=order_type, size=size, status="queued")
+        return False
     try:
-        ws.place_order(
-            account_id=account_id,
-            symbol=ticker,
-            amount=size,
-            order_type=order_type
-        )
+        with cycle_timer.stage("order"):
+            ws.place_order(
+                account_id=account_id,
+                symbol=ticker,
+                amount=size,
+                order_type=order_type
+            )
+        cycle_timer.mark_order()
+        ORDERS.inc(side=order_type, status="placed")
+        journal.record_order(ticker=ticker, side=order_type, size=size, status="placed")
         logging.info(f"Placed {order_type} order for {ticker} of size {size}.")
+        return True
     except Exception as e:
+        ORDERS.inc(side=order_type, status="failed")
+        journal.record_order(ticker=ticker, side=order_type, size=size, status="failed", error=str(e))
         logging.error(f"Error placing {order_type} order for {ticker}: {e}")
+        return False
+
+def record_queued_order(order, error):
+    # A failed buy never opened the position; a sell only closes it once placed
+    if order["order_type"] == ("buy" if error else "sell"):
+        current_positions.pop(order["ticker"], None)
+    status = "failed" if error else "placed"
+    ORDERS.inc(side=order["order_type"], status=status)
+    journal.record_order(ticker=order["ticker"], side=order["order_type"], size=order["size"], status=status,
+                         error=str(error) if error else None)
 
 def trade_logic(data, ws, account_id, ticker):
-    global current_position
+    current_position = current_positions.get(ticker)
 
     if data is None or data.empty or "price" not in data.columns:
         logging.warning("Data is invalid or missing required fields.")
@@ -96,48 +210,205 @@ def trade_logic(data, ws, account_id, ticker):
         logging.error(f"Missing required indicator {e}. Cannot proceed with trade logic.")
         return
 
-    logging.info(
-        f"Indicators - Price: {price:.2f}, SMA Short: {sma_short:.2f}, SMA Long: {sma_long:.2f}, "
-        f"VWAP: {vwap:.2f}, RSI: {rsi:.2f}"
-    )
-
+    signal = "none"
     if (price > vwap and sma_short > sma_long and rsi < RSI_OVERSOLD and
             (not current_position or current_position != 'long')):
+        signal = "buy"
         logging.info("Advanced Buy Signal triggered.")
-        available_balance = get_account_balance(ws, account_id)
+        available_balance = get_available_cash(ws, account_id)
         trade_size = calculate_trade_size(available_balance, TRADE_AMOUNT)
-        place_order(ws, account_id, ticker, trade_size, "buy")
-        current_position = "long"
+        if trade_size <= 0:
+            logging.warning(f"No cash left for a {ticker} buy after queued orders.")
+        elif order_queue is not None:
+            current_positions[ticker] = "long"  # Undone by record_queued_order if the buy fails
+            place_order(ws, account_id, ticker, trade_size, "buy")
+        elif place_order(ws, account_id, ticker, trade_size, "buy"):
+            current_positions[ticker] = "long"
 
     elif ((price < vwap or sma_short < sma_long or rsi > RSI_OVERBOUGHT) and
           current_position == "long"):
+        signal = "sell"
         logging.info("Advanced Sell Signal triggered.")
-        position_size = get_position_size(ws, account_id, ticker)
-        place_order(ws, account_id, ticker, position_size, "sell")
-        current_position = None
+        if order_queue is not None and order_queue.pending(account_id, ticker):
+            # The buy has not reached the broker yet (or the sell is already queued), so the position is unknown
+            logging.info(f"Order for {ticker} still in flight; deciding again on the next bar.")
+        else:
+            position_size = get_position_size(ws, account_id, ticker)
+            if position_size == 0:
+                logging.warning(f"No {ticker} shares to sell yet; keeping the position open.")
+            elif position_size is not None and place_order(ws, account_id, ticker, position_size, "sell"):
+                current_positions.pop(ticker, None)
+
+    TRADE_LOGIC_EVALUATIONS.inc(signal=signal)
+    journal.record_decision(
+        bar_time=data.index[-1].value, ticker=ticker, price=float(price), sma_short=float(sma_short),
+        sma_long=float(sma_long), vwap=float(vwap), rsi=float(rsi), position=current_position, signal=signal,
+    )
+
+def closed_bars(data, interval):
+    # Drop the bar that is still forming so the indicator engine only sees final bars
+    now = market_now(data.index.tz)
+    return data[data.index + to_timedelta(interval) <= now].copy()
+
+def download_new_bars(tickers, period, interval, downloader=yf.download, **kwargs):
+    # Only ask for bars after the oldest last-stored bar; fall back to the full period on a cold cache
+    batch = [tickers] if isinstance(tickers, str) else tickers
+    lasts = [bar_store.last_timestamp(ticker, interval) for ticker in batch]
+    last = None if any(last is None for last in lasts) else min(lasts)
+    if last is None or market_now(last.tz) - last > to_timedelta(period):
+        mode, window = "full", {"period": period}
+    else:
+        mode, window = "delta", {"start": last + to_timedelta(interval)}
 
-def fetch_stock_data(ticker, period="1d", interval="1m"):
+    started = time.perf_counter()
     try:
-        data = yf.download(ticker, period=period, interval=interval)
-        if data.empty:
+        return downloader(tickers, interval=interval, **window, **kwargs)
+    finally:
+        DOWNLOADS.inc(mode=mode)
+        DOWNLOAD_SECONDS.observe(time.perf_counter() - started, mode=mode)
+
+def load_stock_data(ticker, period="1d", interval="1m"):
+    try:
+        last = bar_store.last_timestamp(ticker, interval)
+        if last is None:
             logging.warning(f"No data fetched for {ticker}.")
             return None
-        data["price"] = data["Close"]
-        return calculate_vwap(data)
+        with cycle_timer.stage("fetch"):
+            data = bar_store.read(ticker, interval, since=last - to_timedelta(period))
+            data["price"] = data["Close"]
+        with cycle_timer.stage("indicators"):
+            get_indicator_engine(ticker).update_frame(data)
+            update_timeframes(ticker, data)
+            return data
     except Exception as e:
         logging.error(f"Error fetching stock data for {ticker}: {e}")
         return None
 
+def fetch_stock_data(ticker, period="1d", interval="1m", downloader=yf.download):
+    try:
+        with cycle_timer.stage("fetch"):
+            new_bars = split_by_ticker(download_new_bars(ticker, period, interval, downloader), [ticker]).get(ticker)
+            if new_bars is not None:
+                bar_store.append(ticker, interval, closed_bars(new_bars, interval))
+    except Exception as e:
+        logging.error(f"Error downloading new bars for {ticker}: {e}")
+    return load_stock_data(ticker, period, interval)
+
+def fetch_portfolio_data(tickers, period="1d", interval="1m", downloader=yf.download):
+    """
+    Refresh every ticker in one cycle with batched multi-ticker downloads run
+    concurrently, then return a dict of ticker -> indicator frame (or None).
+    """
+    def fetch(batch):
+        return download_new_bars(batch, period, interval, downloader,
+                                 group_by="ticker", threads=False, progress=False)
+
+    def cold(ticker):
+        # Tickers with no stored bars need the full period; keep them from dragging a batch off the delta fetch
+        return bar_store.last_timestamp(ticker, interval) is None
+
+    with cycle_timer.stage("fetch"):
+        new_bars = batch_download(tickers, fetch, PORTFOLIO_BATCH_SIZE, PORTFOLIO_WORKERS, group=cold)
+        for ticker, frame in new_bars.items():
+            bar_store.append(ticker, interval, closed_bars(frame, interval))
+    return {ticker: load_stock_data(ticker, period, interval) for ticker in tickers}
+
+def run_cycle(ws, account_id, tickers, interval="1m", downloader=yf.download):
+    if len(tickers) == 1:
+        all_data = {tickers[0]: fetch_stock_data(tickers[0], period="1d", interval=interval, downloader=downloader)}
+    else:
+        all_data = fetch_portfolio_data(tickers, period="1d", interval=interval, downloader=downloader)
+    for ticker, stock_data in all_data.items():
+        if stock_data is not None:
+            with cycle_timer.stage("decision"):
+                trade_logic(stock_data, ws, account_id, ticker)
+        else:
+            logging.warning(f"No stock data available for {ticker}.")
+    if order_queue is not None and order_queue.flush():
+        cycle_timer.mark_order()
+
+def on_stream_bars(ws, account_id, ticker, bars, interval="1m", live=True):
+    # Completed bars straight from the tick stream: store them, update the indicators, decide
+    engine = get_indicator_engine(ticker)
+    if engine.last_timestamp is not None and bars.index[-1] <= engine.last_timestamp:
+        return
+    cycle_timer.start((bars.index[-1] + to_timedelta(interval)).timestamp() if live else None)
+    try:
+        bar_store.append(ticker, interval, bars)
+        with cycle_timer.stage("indicators"):
+            data = bars.copy()
+            data["price"] = data["Close"]
+            engine.update_frame(data)
+            update_timeframes(ticker, data)
+        with cycle_timer.stage("decision"):
+            trade_logic(data, ws, account_id, ticker)
+        if order_queue is not None and order_queue.flush():
+            cycle_timer.mark_order()
+    finally:
+        cycle_timer.finish()
+        if cycle_timer.cycles % TIMING_LOG_EVERY == 0:
+            cycle_timer.log_summary()
+
+def run_stream(ws, account_id, tickers, source_url, interval="1m"):
+    # Warm the bar cache and indicator engines so the first streamed bar has full history behind it
+    for ticker in tickers:
+        fetch_stock_data(ticker, period="1d", interval=interval)
+    # A file read once is recorded ticks: only the ticks themselves move the bar clock
+    live = not source_url.startswith("file+once:")
+    stream = TickStream(
+        open_tick_source(source_url, tickers), interval,
+        on_bar=lambda ticker, bars: on_stream_bars(ws, account_id, ticker, bars, interval, live),
+        tz=STREAM_TIMEZONE, grace=BAR_OFFSET_SECONDS, clock=time.time if live else None,
+        # One snapshot per bar, once every ticker has closed it, rather than one per ticker
+        on_boundary=lambda end: checkpoint(),
+    )
+    logging.info(f"Streaming ticks for {', '.join(tickers)} from {source_url}.")
+    try:
+        stream.run()
+    finally:
+        stream.stop()
+        checkpoint()
+        logging.info(f"Tick stream ended: {stream.stats}")
+
+def checkpoint():
+    # Persist positions and indicator state so a restart picks up where this cycle left off
+    if not SNAPSHOT_PATH:
+        return
+    try:
+        with cycle_timer.stage("snapshot"):
+            save_snapshot(SNAPSHOT_PATH, current_positions, indicator_engines)
+    except Exception as e:
+        logging.error(f"Error saving snapshot: {e}")
+
+def restore_state():
+    if not SNAPSHOT_PATH:
+        return
+    positions, engines = load_snapshot(SNAPSHOT_PATH, SHORT_WINDOW, LONG_WINDOW, RSI_PERIOD)
+    current_positions.update(positions)
+    indicator_engines.update(engines)
+
+def login_wealthsimple():
+    ws = Wealthsimple(USERNAME, PASSWORD, two_factor_callback=lambda: pyotp.TOTP(AUTH_SECRET_KEY).now())
+    logging.info("Logged in to Wealthsimple successfully.")
+    return ws
+
 def initialize_wealthsimple():
     try:
-        ws = Wealthsimple(USERNAME, PASSWORD, two_factor_callback=lambda: pyotp.TOTP(AUTH_SECRET_KEY).now())
-        logging.info("Logged in to Wealthsimple successfully.")
-        return ws
+        if BROKER == "mock":
+            return BrokerClient(lambda: MockBroker(account_name=ACCOUNT_NAME), ttl=BROKER_CACHE_TTL)
+        return BrokerClient(login_wealthsimple, ttl=BROKER_CACHE_TTL)
     except Exception as e:
         logging.error(f"Error logging into Wealthsimple: {e}")
         return None
 
 def main():
+    global order_queue
+
+    setup_logging()
+    restore_state()
+    for ticker in SECURITIES:
+        for interval in TIMEFRAMES:
+            get_timeframe(ticker, interval)
     ws = initialize_wealthsimple()
     if not ws:
         logging.critical("Wealthsimple session initialization failed. Exiting.")
@@ -148,16 +419,32 @@ def main():
         logging.critical(f"Failed to retrieve account ID for '{ACCOUNT_NAME}'. Exiting.")
         return
 
-    while True:
-        try:
-            stock_data = fetch_stock_data(SECURITY, period="1d", interval="1m")
-            if stock_data is not None:
-                trade_logic(stock_data, ws, account_id, SECURITY)
-            else:
-                logging.warning("No stock data available.")
-        except Exception as e:
-            logging.error(f"Unexpected error in main loop: {e}")
-        time.sleep(60)
+    if METRICS_PORT:
+        start_http_server(METRICS_PORT)
+    if ORDER_WORKERS > 0:
+        order_queue = OrderQueue(workers=ORDER_WORKERS, rate_per_second=ORDER_RATE_LIMIT,
+                                 burst=max(1, int(ORDER_RATE_LIMIT)), max_retries=ORDER_MAX_RETRIES,
+                                 on_result=record_queued_order)
+
+    scheduler = BarScheduler(interval=60, offset=BAR_OFFSET_SECONDS, late_policy=LATE_TICK_POLICY)
+    try:
+        if STREAM_SOURCE:
+            run_stream(ws, account_id, SECURITIES, STREAM_SOURCE)
+            return
+        while True:
+            bar_close = scheduler.wait()
+            cycle_timer.start(bar_close)
+            try:
+                run_cycle(ws, account_id, SECURITIES)
+            except Exception as e:
+                logging.error(f"Unexpected error in main loop: {e}")
+            checkpoint()
+            cycle_timer.finish()
+            if cycle_timer.cycles % TIMING_LOG_EVERY == 0:
+                cycle_timer.log_summary()
+    finally:
+        if order_queue is not None:
+            order_queue.close()
 
 if __name__ == "__main__":
     main()